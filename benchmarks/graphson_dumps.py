@@ -0,0 +1,95 @@
+"""
+Compare the compiled GraphSON encoders with the reference implementation
+that calls ``GraphSONWriter.toDict`` for every value.
+
+Usage: python benchmarks/graphson_dumps.py [--vertices N] [--repeat R]
+"""
+
+import argparse
+import timeit
+
+from gremlin_python.process.traversal import Cardinality
+
+from hobgoblin import element, properties
+from hobgoblin.fileio import encoders, graphson
+
+
+class Location(element.VertexProperty):
+    year = properties.Property(properties.Integer)
+
+
+class Person(element.Vertex):
+    name = properties.Property(properties.String)
+    age = properties.Property(properties.Integer)
+    score = properties.Property(properties.Float)
+    active = properties.Property(properties.Boolean)
+    nicknames = element.VertexProperty(
+        properties.String, card=Cardinality.list_)
+    location = Location(properties.String, card=Cardinality.list_)
+
+
+class Knows(element.Edge):
+    notes = properties.Property(properties.String)
+    weight = properties.Property(properties.Float)
+
+
+def adj_lists(count):
+    people = []
+    for i in range(count):
+        person = Person()
+        person.id = i
+        person.name = 'person{}'.format(i)
+        person.age = i % 90
+        person.score = i / 7
+        person.active = bool(i % 2)
+        person.nicknames = ['p{}'.format(i), 'n{}'.format(i)]
+        person.location = 'city{}'.format(i % 100)
+        person.location('city{}'.format(i % 100)).year = 2000 + i % 20
+        people.append(person)
+    result = []
+    for i, person in enumerate(people):
+        out_edges = []
+        for j in (1, 2, 3):
+            knows = Knows(person, people[(i + j) % count])
+            knows.id = count + 3 * i + j
+            knows.notes = 'met'
+            knows.weight = j / 3
+            out_edges.append(knows)
+        result.append(graphson.AdjList(vertex=person, inE=[], outE=out_edges))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--vertices', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    data = adj_lists(args.vertices)
+
+    def reference():
+        ids = graphson.IdAllocator()
+        for adj_list in data:
+            graphson._dumps_reference(adj_list, ids)
+
+    def compiled():
+        ids = graphson.IdAllocator()
+        for adj_list in data:
+            graphson.dumpb(adj_list, ids=ids)
+
+    backend = encoders.json.__name__
+    if encoders.orjson is not None:
+        backend = 'orjson'
+    print('{} adjacency lists, JSON backend: {}'.format(
+        args.vertices, backend))
+    results = {}
+    for name, func in (('reference', reference), ('compiled', compiled)):
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        results[name] = best
+        print('{:>10}: {:.3f}s ({:.0f} lines/s)'.format(
+            name, best, args.vertices / best))
+    print('   speedup: {:.2f}x'.format(
+        results['reference'] / results['compiled']))
+
+
+if __name__ == '__main__':
+    main()
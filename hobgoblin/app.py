@@ -1,12 +1,13 @@
 """Hobgoblin application class and class constructor"""
 
 import collections
+import functools
 import importlib
 import logging
 
 import aiogremlin
 
-from hobgoblin import element, provider, session
+from hobgoblin import element, pool, provider, session, templates
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,17 @@ class Hobgoblin:
     :param asyncio.BaseEventLoop loop: Event loop implementation
     :param dict features: Vendor implementation specific database features
     :param dict config: Config parameters for application
+    :param hobgoblin.cache.ElementCache cache: Optional element cache shared
+        by all sessions created by this app
+    :param int pool_maxsize: If set, sessions borrow their remote connection
+        from a :py:class:`SessionPool<hobgoblin.pool.SessionPool>` keeping up
+        to `pool_maxsize` idle connections, and return it when closed
+    :param int pool_minsize: Number of idle connections the pool always keeps
+    :param float pool_idle_timeout: Seconds after which surplus idle
+        connections are dropped
+    :param int template_cache_size: Maximum number of CRUD traversal
+        templates kept by the app, see
+        :py:class:`TemplateCache<hobgoblin.templates.TemplateCache>`
     """
 
     def __init__(self,
@@ -29,7 +41,12 @@ class Hobgoblin:
                  *,
                  provider=provider.TinkerGraph,
                  get_hashable_id=None,
-                 aliases=None):
+                 aliases=None,
+                 cache=None,
+                 pool_maxsize=None,
+                 pool_minsize=0,
+                 pool_idle_timeout=None,
+                 template_cache_size=1024):
         self._cluster = cluster
         self._loop = self._cluster._loop
         self._cluster = cluster
@@ -43,6 +60,16 @@ class Hobgoblin:
         if aliases is None:
             aliases = {}
         self._aliases = aliases
+        self._cache = cache
+        self._observers = []
+        self._templates = templates.TemplateCache(template_cache_size)
+        self._pool = None
+        if pool_maxsize:
+            self._pool = pool.SessionPool(
+                self._open_remote_connection,
+                minsize=pool_minsize,
+                maxsize=pool_maxsize,
+                idle_timeout=pool_idle_timeout)
 
     @classmethod
     async def open(cls,
@@ -51,6 +78,11 @@ class Hobgoblin:
                    provider=provider.TinkerGraph,
                    get_hashable_id=None,
                    aliases=None,
+                   cache=None,
+                   pool_maxsize=None,
+                   pool_minsize=0,
+                   pool_idle_timeout=None,
+                   template_cache_size=1024,
                    **config):
         # App currently only supports GraphSON 1
         # aiogremlin does not yet support providers
@@ -60,7 +92,14 @@ class Hobgoblin:
             cluster,
             provider=provider,
             get_hashable_id=get_hashable_id,
-            aliases=aliases)
+            aliases=aliases,
+            cache=cache,
+            pool_maxsize=pool_maxsize,
+            pool_minsize=pool_minsize,
+            pool_idle_timeout=pool_idle_timeout,
+            template_cache_size=template_cache_size)
+        if app.pool is not None:
+            await app.pool.init_pool()
         return app
 
     @property
@@ -71,6 +110,35 @@ class Hobgoblin:
     def config(self):
         return self.cluster.config
 
+    @property
+    def cache(self):
+        """Element cache shared by sessions, or ``None``"""
+        return self._cache
+
+    @property
+    def templates(self):
+        """CRUD traversal templates shared by sessions"""
+        return self._templates
+
+    @property
+    def observers(self):
+        """Registered :py:class:`Observer<hobgoblin.hooks.Observer>` objects"""
+        return self._observers
+
+    def register_observer(self, observer):
+        """
+        Register an observer notified of the requests sent by this app's
+        sessions, see :py:mod:`hobgoblin.hooks`.
+
+        :param hobgoblin.hooks.Observer observer:
+        """
+        self._observers.append(observer)
+
+    @property
+    def pool(self):
+        """Pool of connections borrowed by sessions, or ``None``"""
+        return self._pool
+
     @property
     def vertices(self):
         """Registered vertex classes"""
@@ -137,15 +205,62 @@ class Hobgoblin:
                 elements.append(item)
         self.register(*elements)
 
-    async def session(self, *, processor='', op='eval', aliases=None):
+    async def session(self,
+                      *,
+                      processor='',
+                      op=None,
+                      aliases=None,
+                      identity_map=None):
         """
         Create a session object.
 
+        :param str op: If ``'eval'``, the session saves and removes elements
+            with canonical parameterized scripts (see
+            :py:mod:`hobgoblin.scripts`) whose text never changes, so Gremlin
+            Server compiles each of them once. Otherwise it submits bytecode
+        :param hobgoblin.identity.IdentityMap identity_map: Identity map
+            holding the session's elements, e.g. a bounded
+            :py:class:`LRUIdentityMap<hobgoblin.identity.LRUIdentityMap>` or a
+            :py:class:`WeakIdentityMap<hobgoblin.identity.WeakIdentityMap>`
+            for long running sessions
+
         :returns: :py:class:`Session<hobgoblin.session.Session>` object
         """
-        remote_connection = await aiogremlin.DriverRemoteConnection.using(
+        if self._pool is None:
+            remote_connection = await self._open_remote_connection()
+            script_client = None
+            if op == 'eval':
+                script_client = await self._cluster.connect(
+                    aliases=self._aliases)
+            return session.Session(
+                self,
+                remote_connection,
+                self._get_hashable_id,
+                identity_map=identity_map,
+                script_client=script_client)
+        conn = await self._pool.acquire()
+        if op == 'eval' and conn.script_client is None:
+            conn.script_client = await self._cluster.connect(
+                aliases=self._aliases)
+        return session.Session(
+            self,
+            conn.remote_connection,
+            self._get_hashable_id,
+            identity_map=identity_map,
+            script_client=conn.script_client if op == 'eval' else None,
+            graph=conn.graph,
+            internal_source=conn.source,
+            release=functools.partial(self._pool.release, conn))
+
+    async def _open_remote_connection(self):
+        return await aiogremlin.DriverRemoteConnection.using(
             self._cluster, aliases=self._aliases)
-        return session.Session(self, remote_connection, self._get_hashable_id)
 
     async def close(self):
+        if self._pool is not None:
+            if self._pool.acquired:
+                logger.warning(
+                    '%d pooled connections were never released, close '
+                    'sessions when done with them', self._pool.acquired)
+            await self._pool.close()
         await self._cluster.close()
@@ -0,0 +1,117 @@
+"""Read-through cache of element data shared by an app's sessions"""
+
+import collections
+import copy
+import time
+
+
+class ElementCache:
+    """
+    Caches the db rows used to hydrate elements, keyed by element type and
+    hashable element id, so that sessions can skip the network for hot
+    elements. Entries expire after `ttl` seconds and the least recently used
+    entry is evicted when the cache is full. Sessions invalidate entries for
+    elements they save or remove, and the entries of a removed vertex's
+    edges; writes made by plain traversals aren't seen.
+
+    :param int maxsize: Maximum number of cached elements
+    :param float ttl: Seconds before an entry expires, ``None`` for never
+    :param clock: Callable returning the current time in seconds
+    """
+
+    def __init__(self, maxsize=10000, ttl=None, *, clock=time.monotonic):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._rows = collections.OrderedDict()
+        # Maps keys -> keys of the entries referring to them
+        self._refs = collections.defaultdict(set)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def evictions(self):
+        """Number of entries dropped because they expired or didn't fit"""
+        return self._evictions
+
+    def get(self, key):
+        """
+        Get a copy of the cached row for `key`.
+
+        :returns: dict | None
+        """
+        try:
+            expires, row, _ = self._rows[key]
+        except KeyError:
+            self._misses += 1
+            return None
+        if expires is not None and expires <= self._clock():
+            self._drop(key)
+            self._evictions += 1
+            self._misses += 1
+            return None
+        self._rows.move_to_end(key)
+        self._hits += 1
+        return copy.deepcopy(row)
+
+    def set(self, key, row, refs=()):
+        """
+        Cache a copy of `row` for `key`.
+
+        :param refs: Keys whose invalidation also drops this entry, e.g.
+            an edge's endpoints
+        """
+        self._drop(key)
+        expires = None
+        if self._ttl is not None:
+            expires = self._clock() + self._ttl
+        self._rows[key] = (expires, copy.deepcopy(row), tuple(refs))
+        for ref in refs:
+            self._refs[ref].add(key)
+        while len(self._rows) > self._maxsize:
+            self._drop(next(iter(self._rows)))
+            self._evictions += 1
+
+    def invalidate(self, key):
+        """Drop the entry for `key`, if any, and the entries referring to it"""
+        self._drop(key)
+        for referrer in self._refs.pop(key, ()):
+            self._drop(referrer)
+
+    def clear(self):
+        self._rows.clear()
+        self._refs.clear()
+
+    def _drop(self, key):
+        entry = self._rows.pop(key, None)
+        if entry is None:
+            return
+        for ref in entry[2]:
+            referrers = self._refs.get(ref)
+            if referrers is not None:
+                referrers.discard(key)
+                if not referrers:
+                    del self._refs[ref]
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,244 @@
+"""
+Column oriented traversal results. Analytics jobs that only aggregate
+property values can read them as arrays instead of hydrating OGM elements.
+"""
+
+from aiogremlin.process.graph_traversal import __
+from gremlin_python.process.traversal import Bytecode, Cardinality, Traverser
+
+from hobgoblin import properties
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# NumPy dtypes of the data types with a native array representation.
+# Integer and boolean columns holding nulls fall back to object arrays, nulls
+# are NaN in float columns.
+DTYPES = {
+    properties.Integer: 'int64',
+    properties.Float: 'float64',
+    properties.Boolean: 'bool'
+}
+
+
+class Columns:
+    """
+    A chunk of column oriented results. Columns are NumPy arrays if NumPy
+    is installed, lists otherwise. Values of properties with list or set
+    cardinality are lists.
+
+    :ivar ids: Element ids
+    :ivar labels: Element labels
+    :ivar sources: Ids of the edges' source vertices, ``None`` for vertices
+    :ivar targets: Ids of the edges' target vertices, ``None`` for vertices
+    :ivar dict columns: Maps OGM property names to their values
+    """
+
+    def __init__(self, ids, labels, columns, sources=None, targets=None):
+        self.ids = ids
+        self.labels = labels
+        self.columns = columns
+        self.sources = sources
+        self.targets = targets
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return '<{}(rows={}, columns={})>'.format(
+            self.__class__.__name__, len(self), list(self.columns))
+
+
+class ColumnPlan:
+    """
+    Describes how results for an element class are projected and turned
+    into columns. Values are converted with the data types' ``to_ogm``
+    when it isn't an identity, but are not validated.
+
+    :param hobgoblin.element.Element element_class:
+    :param only: Names of the properties to fetch, all by default
+    """
+
+    def __init__(self, element_class, only=None):
+        mapping = element_class.__mapping__
+        self._edge = element_class.__type__ == 'edge'
+        self._columns = []
+        for name, prop in element_class.__properties__.items():
+            if name not in mapping.ogm_properties:
+                continue
+            if only is not None and name not in only:
+                continue
+            db_name, data_type = mapping.ogm_properties[name]
+            card = getattr(prop, 'cardinality', None)
+            multi = card is not None and card != Cardinality.single
+            to_ogm = mapping.to_ogm_plan[db_name][2]
+            dtype = None if multi else DTYPES.get(type(data_type))
+            self._columns.append((name, db_name, multi, to_ogm, dtype))
+
+    @property
+    def names(self):
+        """Names of the properties with a column"""
+        return [column[0] for column in self._columns]
+
+    def project(self, bytecode):
+        """
+        Copy `bytecode`, appending the projection the columns are read from.
+
+        :returns: :py:class:`~gremlin_python.process.traversal.Bytecode`
+        """
+        keys = tuple(column[1] for column in self._columns)
+        if self._edge:
+            projection = __.project('id', 'label', 'outV', 'inV',
+                                    'properties') \
+                           .by(__.id()).by(__.label()) \
+                           .by(__.outV().id()).by(__.inV().id()) \
+                           .by(__.valueMap(*keys))
+        else:
+            projection = __.project('id', 'label', 'properties') \
+                           .by(__.id()).by(__.label()) \
+                           .by(__.valueMap(*keys))
+        original = bytecode
+        bytecode = Bytecode(original)
+        bytecode.bindings.update(original.bindings)
+        bytecode.step_instructions.extend(
+            projection.bytecode.step_instructions)
+        bytecode.bindings.update(projection.bytecode.bindings)
+        return bytecode
+
+    def build(self, rows):
+        """
+        Turn projected rows into columns.
+
+        :returns: :py:class:`Columns`
+        """
+        ids = []
+        labels = []
+        values = [[] for _ in self._columns]
+        sources = targets = None
+        if self._edge:
+            sources = []
+            targets = []
+        for row in rows:
+            ids.append(row['id'])
+            labels.append(row['label'])
+            if self._edge:
+                sources.append(row['outV'])
+                targets.append(row['inV'])
+            props = row['properties']
+            for column, (_, db_name, multi, to_ogm, _) in zip(
+                    values, self._columns):
+                val = props.get(db_name)
+                if multi:
+                    val = list(val or ())
+                    if to_ogm is not None:
+                        val = [to_ogm(v) for v in val]
+                else:
+                    # Vertex property values are listed by valueMap
+                    if val is not None and not self._edge:
+                        val = val[0] if val else None
+                    if val is not None and to_ogm is not None:
+                        val = to_ogm(val)
+                column.append(val)
+        columns = {
+            column[0]: _array(vals, column[4])
+            for column, vals in zip(self._columns, values)
+        }
+        if self._edge:
+            sources = _array(sources)
+            targets = _array(targets)
+        return Columns(_array(ids), _array(labels), columns, sources, targets)
+
+
+class ColumnStream:
+    """
+    Async iterator over the :py:class:`Columns` of a traversal's results,
+    in chunks of at most `chunk_size` rows. Each chunk is only read from
+    the driver when the consumer asks for it. Use
+    :py:meth:`Session.columns<hobgoblin.session.Session.columns>` to create
+    one.
+
+    :param hobgoblin.session.Session session:
+    :param gremlin_python.process.traversal.Bytecode bytecode: Projecting
+        bytecode, see :py:meth:`ColumnPlan.project`
+    :param ColumnPlan plan:
+    :param int chunk_size:
+    """
+
+    def __init__(self, session, bytecode, plan, chunk_size):
+        self._session = session
+        self._bytecode = bytecode
+        self._plan = plan
+        self._chunk_size = max(chunk_size, 1)
+        self._traversers = None
+        self._event = None
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        columns = await self._read(self._chunk_size)
+        if columns is None:
+            raise StopAsyncIteration
+        return columns
+
+    async def all(self):
+        """
+        Get all remaining results as a single chunk, ``None`` when
+        exhausted
+        """
+        return await self._read(None)
+
+    async def _read(self, size):
+        if self._traversers is None:
+            await self._submit()
+        rows = []
+        while not self._done and (size is None or len(rows) < size):
+            try:
+                result = await self._traversers.__anext__()
+            except StopAsyncIteration:
+                self._done = True
+                if self._event is not None:
+                    self._session._respond(self._event)
+                break
+            except Exception as e:
+                self._session._fail(self._event, e)
+                raise
+            if isinstance(result, Traverser):
+                rows.extend([result.object] * result.bulk)
+            else:
+                rows.append(result)
+        if not rows:
+            return None
+        if self._event is not None:
+            self._event.count += len(rows)
+        return self._plan.build(rows)
+
+    async def _submit(self):
+        session = self._session
+        await session.flush()
+        self._event = session._request(self._bytecode)
+        try:
+            remote_traversal = await session.remote_connection.submit(
+                self._bytecode)
+        except Exception as e:
+            session._fail(self._event, e)
+            raise
+        self._traversers = remote_traversal.traversers
+
+
+def _array(values, dtype=None):
+    if numpy is None:
+        return values
+    if dtype is None or (dtype != 'float64' and None in values):
+        # Filled item by item so that list values aren't broadcast
+        array = numpy.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            array[i] = value
+        return array
+    return numpy.array(values, dtype=dtype)
@@ -6,6 +6,7 @@ import inflection
 from gremlin_python.process.traversal import Cardinality
 
 from hobgoblin import abc, exception, mapper, properties
+from hobgoblin.manager import VertexPropertyManager
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,8 @@ class ElementMeta(type):
     Metaclass for graph elements. Responsible for creating the
     :py:class:`Mapping<hobgoblin.mapper.Mapping>` object and replacing user
     defined :py:class:`hobgoblin.properties.Property` with
-    :py:class:`hobgoblin.properties.PropertyDescriptor`.
+    :py:class:`hobgoblin.properties.PropertyDescriptor`. Property values are
+    stored in slots, unless the class defines its own ``__slots__``.
     """
 
     def __new__(cls, name, bases, namespace, **kwargs):
@@ -35,21 +37,34 @@ class ElementMeta(type):
         if not namespace.get('__label__', None):
             namespace['__label__'] = inflection.underscore(name)
         new_namespace = {}
+        slots = []
         props.pop('id', None)
+        inherited = set(props)
         for k, v in namespace.items():
             if isinstance(v, abc.BaseProperty):
                 if element_type == 'edge' and hasattr(v, 'cardinality'):
                     raise exception.MappingError(
                         'Edge property cannot have set/list cardinality')
+                # Values are stored in '_' + name, which must not clash
+                # with the attributes of the element classes themselves
+                if k != 'id' and k not in inherited and any(
+                        hasattr(base, '_' + k) for base in bases):
+                    raise exception.MappingError(
+                        'Reserved property name: {}'.format(k))
                 props[k] = v
                 if k != 'id':
                     if not v.db_name:
                         v.db_name = v.db_name_factory(k,
                                                       namespace['__label__'])
                 v = v.__descriptor__(k, v)
+                if not any(hasattr(base, '_' + k) for base in bases):
+                    slots.append('_' + k)
             new_namespace[k] = v
+        new_namespace.setdefault('__slots__', tuple(slots))
         new_namespace['__mapping__'] = mapper.create_mapping(namespace, props)
         new_namespace['__properties__'] = props
+        # Property names accepted as keyword arguments
+        new_namespace['__allowed__'] = frozenset(k for k in props if k != 'id')
         result = type.__new__(cls, name, bases, new_namespace)
         return result
 
@@ -57,17 +72,116 @@ class ElementMeta(type):
 class Element(metaclass=ElementMeta):
     """Base class for classes that implement the Element property interface"""
 
+    # Property values live in slots added by ElementMeta. __dict__ is kept
+    # for attributes that aren't mapped, e.g. those of generic elements.
+    # Tracking state uses private names, out of the way of user properties
+    __slots__ = ('__dict__', '__weakref__', '_id', '__dirty', '__loaded',
+                 '__loader')
+
     def __init__(self, **kwargs):
+        allowed = self.__allowed__
         for key, value in kwargs.items():
-            if not (hasattr(self, key) and isinstance(
-                    getattr(self, key), properties.PropertyDescriptor)):
+            if key not in allowed:
                 raise AssertionError(
                     "No such property: {} for element {}".format(
                         key, self.__class__.__name__))
             setattr(self, key, value)
 
+    @classmethod
+    def from_rows(cls, rows, *, fields=None, validate=True):
+        """
+        Build many elements, e.g. from the rows of an import file.
+
+        :param rows: Iterable of dicts mapping property names (or 'id',
+            and 'source'/'target' for edges) to values, or of sequences of
+            values ordered as `fields`
+        :param list fields: Names of the sequence columns
+        :param bool validate: Set values through the property descriptors.
+            Otherwise plain property values and ids are stored as is
+
+        :returns: list of elements
+        """
+        attrs = {}
+
+        def attr(name):
+            try:
+                return attrs[name]
+            except KeyError:
+                attrs[name] = cls._row_attr(name, validate)
+                return attrs[name]
+
+        elements = []
+        if fields is not None:
+            columns = [attr(name) for name in fields]
+            for row in rows:
+                elem = cls()
+                for column, value in zip(columns, row):
+                    setattr(elem, column, value)
+                elements.append(elem)
+        else:
+            for row in rows:
+                elem = cls()
+                for name, value in row.items():
+                    setattr(elem, attr(name), value)
+                elements.append(elem)
+        return elements
+
+    @classmethod
+    def _row_attr(cls, name, validate):
+        """Attribute that :py:meth:`from_rows` sets for property `name`"""
+        if name == 'id':
+            return 'id' if validate else '_id'
+        if cls.__type__ == 'edge' and name in ('source', 'target'):
+            return name
+        if name not in cls.__allowed__:
+            raise exception.MappingError(
+                "unrecognized property {} for class: {}".format(
+                    name, cls.__name__))
+        if not validate:
+            for ogm_name, _, attr, _ in cls.__mapping__.to_db_plan:
+                if ogm_name == name and attr is not None:
+                    return attr
+        return name
+
     id = properties.IdProperty(properties.Generic)
 
+    def _getdirty(self):
+        try:
+            return self.__dirty
+        except AttributeError:
+            return None
+
+    def _setdirty(self, names):
+        self.__dirty = names
+
+    # Names of properties changed since the element was last loaded/saved,
+    # ``None`` until then (all properties are written)
+    __dirty__ = property(_getdirty, _setdirty)
+
+    def _getloaded(self):
+        try:
+            return self.__loaded
+        except AttributeError:
+            return None
+
+    def _setloaded(self, names):
+        self.__loaded = names
+
+    # Names of properties fetched from the db, ``None`` if all were fetched
+    __loaded__ = property(_getloaded, _setloaded)
+
+    def _getloader(self):
+        try:
+            return self.__loader
+        except AttributeError:
+            return None
+
+    def _setloader(self, loader):
+        self.__loader = loader
+
+    # Loader shared by lazily hydrated sibling elements, see Session.load
+    __loader__ = property(_getloader, _setloader)
+
 
 class VertexPropertyDescriptor:
     """
@@ -86,18 +200,24 @@ class VertexPropertyDescriptor:
     def __get__(self, obj, objtype):
         if obj is None:
             return getattr(objtype.__mapping__, self._prop_name)
+        try:
+            return getattr(obj, self._name)
+        except AttributeError:
+            properties.check_loaded(obj, self._prop_name)
         default = self._default
         if default is not None:
-
             default = self._data_type.validate_vertex_prop(
                 default, self._cardinality, self._vertex_property,
                 self._data_type)
-        return getattr(obj, self._name, default)
+        return default
 
     def __set__(self, obj, val):
         if val is not None:
             val = self._data_type.validate_vertex_prop(
                 val, self._cardinality, self._vertex_property, self._data_type)
+            if isinstance(val, VertexPropertyManager):
+                val.bind(obj, self._prop_name)
+        properties.mark_dirty(obj, self._prop_name)
         setattr(obj, self._name, val)
 
 
@@ -105,6 +225,13 @@ class VertexProperty(Element, abc.BaseProperty):
     """Base class for user defined vertex properties."""
 
     __descriptor__ = VertexPropertyDescriptor
+    __slots__ = ('_data_type', '_val', '_cardinality')
+
+    # Only set on instances that define a vertex property of an element
+    # class, value instances share these defaults
+    _default = None
+    _db_name = None
+    _db_name_factory = staticmethod(properties.noop_factory)
 
     def __init__(self,
                  data_type,
@@ -113,15 +240,15 @@ class VertexProperty(Element, abc.BaseProperty):
                  db_name=None,
                  card=None,
                  db_name_factory=None):
-        if not db_name_factory:
-            def db_name_factory(x, y):
-                pass
         if isinstance(data_type, type):
             data_type = data_type()
-        self._db_name_factory = db_name_factory
+        if db_name_factory:
+            self._db_name_factory = db_name_factory
+        if default is not None:
+            self._default = default
+        if db_name is not None:
+            self._db_name = db_name
         self._data_type = data_type
-        self._default = default
-        self._db_name = db_name
         self._val = None
         if card is None:
             card = Cardinality.single
@@ -161,6 +288,8 @@ class VertexProperty(Element, abc.BaseProperty):
         return self._val
 
     def setvalue(self, val):
+        if val != self._val:
+            properties.mark_dirty(self, '__value__')
         self._val = val
 
     value = property(getvalue, setvalue)
@@ -185,6 +314,8 @@ class VertexProperty(Element, abc.BaseProperty):
 class Vertex(Element):
     """Base class for user defined Vertex classes"""
 
+    __slots__ = ()
+
     def to_dict(self):
         result = {'__label__': self.__label__, '__type__': self.__type__}
         for key, value in self.__properties__.items():
@@ -244,6 +375,8 @@ class Edge(Element):
     :param Vertex target: Target (inV) vertex
     """
 
+    __slots__ = ('_source', '_target')
+
     def __init__(self, source=None, target=None):
         self.source = source
         self.target = target
@@ -18,6 +18,25 @@ class ElementError(Exception):
     pass
 
 
+class NotLoadedError(ElementError):
+    """Raised when reading a property that hasn't been fetched from the db"""
+    pass
+
+
+class FlushError(ElementError):
+    """
+    Raised by :py:meth:`Session.flush<hobgoblin.session.Session.flush>`
+    when some pending elements could not be saved.
+
+    :param list errors: (element, exception) pairs
+    """
+
+    def __init__(self, errors):
+        super().__init__(
+            "{} element(s) could not be saved".format(len(errors)))
+        self.errors = errors
+
+
 class ConfigurationError(Exception):
     pass
 
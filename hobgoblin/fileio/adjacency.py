@@ -0,0 +1,222 @@
+"""
+Builds GraphSON adjacency lists from separate vertex and edge streams, for
+graphs that don't fit in memory. Encoded vertices and edges are sorted by
+vertex id in bounded runs that are spilled to disk, then merged.
+"""
+
+import heapq
+import itertools
+import os
+import pickle
+import tempfile
+
+from hobgoblin.fileio import encoders, graphson
+
+# Buffer size of spilled run files
+_RUN_BUFFER_SIZE = 1 << 16
+
+
+def _key(vid):
+    """Sort key for vertex ids, which may not be comparable to each other"""
+    if isinstance(vid, int) and not isinstance(vid, bool):
+        return 0, vid, ''
+    return 1, 0, str(vid)
+
+
+class _Runs:
+    """
+    External sort of records, which are tuples starting with a sort key
+    and a sequence number. At most `spill_size` records are held in memory.
+    Spilled runs are merged in tiers: once `fan_in` runs of a level pile up,
+    they are merged into one run of the next level, so each record is only
+    rewritten once per level. The final merge happens lazily in
+    :py:meth:`merged`.
+    """
+
+    def __init__(self, tmpdir, spill_size, fan_in):
+        self._tmpdir = tmpdir
+        self._spill_size = spill_size
+        self._fan_in = max(fan_in, 2)
+        self._records = []
+        # Run file paths by level
+        self._levels = []
+
+    @property
+    def spilled(self):
+        """Number of run files on disk"""
+        return sum(len(runs) for runs in self._levels)
+
+    def add(self, record):
+        self._records.append(record)
+        if len(self._records) >= self._spill_size:
+            self._spill()
+
+    def merged(self):
+        """Iterate over all records, in order"""
+        self._records.sort()
+        runs = [_read_run(run) for level in self._levels for run in level]
+        return heapq.merge(self._records, *runs)
+
+    def _spill(self):
+        self._records.sort()
+        self._add_run(0, self._write_run(self._records))
+        self._records = []
+
+    def _add_run(self, level, run):
+        if level == len(self._levels):
+            self._levels.append([])
+        runs = self._levels[level]
+        runs.append(run)
+        if len(runs) >= self._fan_in:
+            self._levels[level] = []
+            merged = self._write_run(
+                heapq.merge(*(_read_run(path) for path in runs)))
+            for path in runs:
+                os.remove(path)
+            self._add_run(level + 1, merged)
+
+    def _write_run(self, records):
+        with tempfile.NamedTemporaryFile(
+                dir=self._tmpdir, suffix='.run', delete=False,
+                buffering=_RUN_BUFFER_SIZE) as f:
+            for record in records:
+                pickle.dump(record, f, pickle.HIGHEST_PROTOCOL)
+        return f.name
+
+
+def _read_run(path):
+    with open(path, 'rb', buffering=_RUN_BUFFER_SIZE) as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class AdjacencyBuilder:
+    """
+    Assembles adjacency lists from vertices and edges added in any order,
+    e.g. straight from session traversals, or from files read with
+    :py:func:`iter_load<hobgoblin.fileio.graphson.iter_load>`. Elements are
+    encoded when they are added, so only their GraphSON documents are
+    kept, and at most `spill_size` of them in memory.
+
+    Adjacency lists are produced in vertex id order. Edges whose vertices
+    weren't added are dropped and counted in :py:attr:`orphans`.
+
+    Use as a context manager, or call :py:meth:`close`, to remove the
+    spilled files::
+
+        with AdjacencyBuilder() as builder:
+            await builder.add_vertices_async(
+                session.traversal(Person, prefetch=1000))
+            await builder.add_edges_async(
+                session.traversal(Knows, prefetch=1000))
+            builder.write('graph.json.gz', compression='gzip')
+
+    :param int spill_size: Max number of vertices, and of edge endpoints,
+        held in memory
+    :param int fan_in: Number of spilled runs merged together at a time
+    :param str tmpdir: Directory for spilled runs, the system's default
+        temporary directory by default
+    :param hobgoblin.fileio.graphson.IdAllocator ids: Allocator of vertex
+        property ids, a process wide one by default
+    """
+
+    def __init__(self, *, spill_size=100000, fan_in=64, tmpdir=None,
+                 ids=None):
+        self._tmp = tempfile.TemporaryDirectory(dir=tmpdir)
+        self._vertices = _Runs(self._tmp.name, spill_size, fan_in)
+        self._edges = _Runs(self._tmp.name, spill_size, fan_in)
+        self._ids = ids if ids is not None else graphson._ids
+        self._seq = itertools.count()
+        self._orphans = 0
+
+    @property
+    def spill_dir(self):
+        """Temporary directory holding the spilled runs"""
+        return self._tmp.name
+
+    @property
+    def orphans(self):
+        """Number of edge endpoints dropped by the last build"""
+        return self._orphans
+
+    def add_vertex(self, vertex):
+        encoded = encoders.encoder(type(vertex)).encode(vertex, self._ids)
+        self._vertices.add((_key(vertex.id), next(self._seq), encoded))
+
+    def add_edge(self, edge):
+        encoder = encoders.encoder(type(edge))
+        label = edge.__label__
+        self._edges.add((_key(edge.source.id), next(self._seq), 'outE',
+                         label, encoder.encode(edge, 'outV')))
+        self._edges.add((_key(edge.target.id), next(self._seq), 'inE',
+                         label, encoder.encode(edge, 'inV')))
+
+    def add_vertices(self, vertices):
+        for vertex in vertices:
+            self.add_vertex(vertex)
+
+    def add_edges(self, edges):
+        for edge in edges:
+            self.add_edge(edge)
+
+    async def add_vertices_async(self, vertices):
+        """Like :py:meth:`add_vertices`, also accepts async iterables"""
+        await _consume(vertices, self.add_vertex)
+
+    async def add_edges_async(self, edges):
+        """Like :py:meth:`add_edges`, also accepts async iterables"""
+        await _consume(edges, self.add_edge)
+
+    def lines(self):
+        """
+        Merge vertices with their edges.
+
+        :returns: Generator of UTF-8 encoded adjacency lists
+        """
+        self._orphans = 0
+        edges = self._edges.merged()
+        edge = next(edges, None)
+        for key, _, vertex in self._vertices.merged():
+            # Records kept in memory are reused if lines are built again
+            vertex = dict(vertex, inE={}, outE={})
+            while edge is not None and edge[0] < key:
+                self._orphans += 1
+                edge = next(edges, None)
+            while edge is not None and edge[0] == key:
+                _, _, direction, label, encoded = edge
+                vertex[direction].setdefault(label, []).append(encoded)
+                edge = next(edges, None)
+            yield encoders.dumpb(vertex)
+        while edge is not None:
+            self._orphans += 1
+            edge = next(edges, None)
+
+    def write(self, fpath, **kwargs):
+        """
+        Write the adjacency lists to a file, see
+        :py:func:`write_lines<hobgoblin.fileio.graphson.write_lines>`.
+
+        :returns: :py:class:`WriteStats<hobgoblin.fileio.graphson.WriteStats>`
+        """
+        return graphson.write_lines(fpath, self.lines(), **kwargs)
+
+    def close(self):
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def _consume(elements, add):
+    if hasattr(elements, '__aiter__'):
+        async for element in elements:
+            add(element)
+    else:
+        for element in elements:
+            add(element)
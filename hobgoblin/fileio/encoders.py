@@ -0,0 +1,211 @@
+"""
+GraphSON encoders compiled once per element class. They emit the same
+documents as :py:class:`GraphSONWriter.toDict` applied to every value, but
+resolve each property's accessor and GraphSON type when the class is first
+encoded instead of for every value.
+"""
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+from gremlin_python.statics import long
+from gremlin_python.structure.io import graphsonV2d0 as graphson
+
+from hobgoblin import mapper, properties
+from hobgoblin.element import VertexProperty
+from hobgoblin.manager import VertexPropertyManager
+
+writer = graphson.GraphSONWriter()
+
+
+def dumpb(obj):
+    """Serialize `obj` to UTF-8 JSON with the fastest available backend"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _tag(sample):
+    """The GraphSON type the writer uses for values like `sample`"""
+    return writer.toDict(sample)['@type']
+
+
+def _integer_encoder():
+    int_tag = _tag(1)
+    long_tag = _tag(long(1))
+
+    def encode(val):
+        cls = type(val)
+        if cls is int:
+            return {'@type': int_tag, '@value': val}
+        elif cls is long:
+            return {'@type': long_tag, '@value': val}
+        return writer.toDict(val)
+    return encode
+
+
+def _float_encoder():
+    tag = _tag(1.5)
+
+    def encode(val):
+        # NaN and infinities are written as strings, leave them to the writer
+        if type(val) is float and val - val == 0:
+            return {'@type': tag, '@value': val}
+        return writer.toDict(val)
+    return encode
+
+
+def _plain_encoder(python_type):
+    def encode(val):
+        if type(val) is python_type or val is None:
+            return val
+        return writer.toDict(val)
+    return encode
+
+
+def value_encoder(data_type):
+    """
+    Get a function encoding values of `data_type`. Values of an unexpected
+    type are encoded by the writer.
+    """
+    cls = type(data_type)
+    if cls is properties.Integer:
+        return _integer_encoder()
+    elif cls is properties.Float:
+        return _float_encoder()
+    elif cls is properties.String:
+        return _plain_encoder(str)
+    elif cls is properties.Boolean:
+        return _plain_encoder(bool)
+    return writer.toDict
+
+
+def _property_encoders(element_class):
+    """(db name, ogm name, instance attribute, encoder) tuples"""
+    attrs = {ogm: attr for ogm, _, attr, _ in
+             element_class.__mapping__.to_db_plan}
+    return [
+        (db_name, ogm_name, attrs.get(ogm_name), value_encoder(data_type))
+        for db_name, (ogm_name, data_type) in
+        element_class.__mapping__.db_properties.items()
+    ]
+
+
+class VertexEncoder:
+    """
+    Encodes vertices of a class, with their properties and
+    meta-properties, as GraphSON adjacency list documents without edges.
+    """
+
+    def __init__(self, element_class):
+        self._properties = []
+        for db_name, ogm_name, attr, encode in _property_encoders(
+                element_class):
+            prop = element_class.__properties__[ogm_name]
+            metas = None
+            if isinstance(prop, VertexProperty):
+                metas = _property_encoders(type(prop))
+            self._properties.append((db_name, ogm_name, attr, encode, metas))
+
+    def encode(self, vertex, ids):
+        """
+        :param hobgoblin.fileio.graphson.IdAllocator ids: Allocator of
+            vertex property ids
+
+        :returns: dict
+        """
+        props = {}
+        for db_name, ogm_name, attr, encode, metas in self._properties:
+            value = mapper._read(vertex, ogm_name, attr)
+            if metas is None:
+                vps = [_vp(ids.next_id(), encode(value), {})]
+            elif isinstance(value, VertexPropertyManager):
+                vps = [
+                    _vp(ids.next_id(), encode(vp.value), _metas(vp, metas))
+                    for vp in value
+                ]
+            elif value is not None:
+                vps = [_vp(ids.next_id(), encode(value.value),
+                           _metas(value, metas))]
+            else:
+                vps = [_vp(ids.next_id(), None, {})]
+            props[db_name] = vps
+        return {
+            'id': {'@type': 'g:Int32', '@value': vertex.id},
+            'label': vertex.__label__,
+            'properties': props,
+            'outE': {},
+            'inE': {}
+        }
+
+
+class EdgeEncoder:
+    """Encodes the edges of a class as seen from one of their vertices"""
+
+    def __init__(self, element_class):
+        self._properties = _property_encoders(element_class)
+
+    def encode(self, edge, direction):
+        """
+        :param str direction: 'inV' for the target's incoming edges, 'outV'
+            for the source's outgoing edges
+
+        :returns: dict
+        """
+        if direction == 'inV':
+            other = 'outV'
+            other_id = edge.source.id
+        elif direction == 'outV':
+            other = 'inV'
+            other_id = edge.target.id
+        else:
+            raise RuntimeError('Invalid edge type')
+        return {
+            'id': {'@type': 'g:Int32', '@value': edge.id},
+            other: {'@type': 'g:Int32', '@value': other_id},
+            'properties': {
+                db_name: encode(mapper._read(edge, ogm_name, attr))
+                for db_name, ogm_name, attr, encode in self._properties
+            }
+        }
+
+
+def _vp(vp_id, value, metas):
+    return {
+        'id': {'@type': 'g:Int64', '@value': vp_id},
+        'value': value,
+        'properties': metas
+    }
+
+
+def _metas(vp, encoders):
+    return {
+        db_name: encode(mapper._read(vp, ogm_name, attr))
+        for db_name, ogm_name, attr, encode in encoders
+    }
+
+
+# Encoders by element class
+_encoders = {}
+
+
+def encoder(element_class):
+    """
+    Get the encoder of `element_class`, compiling it on first use.
+
+    :returns: :py:class:`VertexEncoder` or :py:class:`EdgeEncoder`
+    """
+    result = _encoders.get(element_class)
+    if result is None:
+        if element_class.__type__ == 'vertex':
+            result = VertexEncoder(element_class)
+        else:
+            result = EdgeEncoder(element_class)
+        _encoders[element_class] = result
+    return result
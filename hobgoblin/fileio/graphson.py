@@ -1,33 +1,545 @@
+import asyncio
 import collections
+import concurrent.futures
+import gzip
+import io
+import itertools
+import mmap
+import os
+import time
 try:
     import ujson as json
 except ImportError:
     import json
 
+from gremlin_python.structure import graph
 from gremlin_python.structure.io import graphsonV2d0 as graphson
-from hobgoblin.element import Vertex, Edge, VertexProperty
-from hobgoblin.manager import ListVertexPropertyManager
+from hobgoblin.element import (
+    Vertex, Edge, GenericEdge, GenericVertex, VertexProperty)
+from hobgoblin.fileio import encoders
+from hobgoblin.manager import VertexPropertyManager
 
 
 writer = graphson.GraphSONWriter()
+reader = graphson.GraphSONReader()
 
 
 AdjList = collections.namedtuple("AdjList", "vertex inE outE")
 
-vp_id = 10
 
+class IdAllocator:
+    """
+    Hands out the ids of exported vertex properties from
+    ``range(start, stop)``. Safe to share between threads.
 
-def dump(fpath, *adj_lists, mode="w"):
-    """Convert Hobgoblin elements to GraphSON"""
-    with open(fpath, mode) as f:
+    :param int start: First id
+    :param int stop: Exclusive upper bound, unbounded if None
+    """
+
+    def __init__(self, start=0, stop=None):
+        self._start = start
+        self._stop = stop
+        self._ids = itertools.count(start)
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def stop(self):
+        return self._stop
+
+    def next_id(self):
+        vp_id = next(self._ids)
+        if self._stop is not None and vp_id >= self._stop:
+            raise ValueError(
+                'Vertex property ids exhausted in range({}, {})'.format(
+                    self._start, self._stop))
+        return vp_id
+
+
+# Used when no allocator is passed, ids are unique within the process
+_ids = IdAllocator(10)
+
+
+# Bytes of serialized lines buffered before each write
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+COMPRESSIONS = ('gzip', 'zstd')
+
+
+class WriteStats:
+    """
+    Throughput of a GraphSON export.
+
+    :ivar int lines: Number of adjacency lists written
+    :ivar int bytes: Number of uncompressed bytes written
+    :ivar float duration: Seconds between opening and closing the file
+    """
+
+    def __init__(self):
+        self.lines = 0
+        self.bytes = 0
+        self.duration = 0.0
+
+    @property
+    def lines_per_second(self):
+        return self.lines / self.duration if self.duration else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.duration if self.duration else 0.0
+
+    def __repr__(self):
+        return '<{}(lines={}, bytes={}, duration={:.3f})>'.format(
+            self.__class__.__name__, self.lines, self.bytes, self.duration)
+
+
+class _Sink:
+    """
+    Binary, optionally compressed, output file. Serialized lines are
+    buffered and written `buffer_size` bytes at a time.
+    """
+
+    def __init__(self, fpath, mode, compression, level, buffer_size, ids):
+        if compression not in (None,) + COMPRESSIONS:
+            raise ValueError(
+                'Unknown compression: {}'.format(compression))
+        self._raw = open(fpath, mode + 'b')
+        self._file = self._raw
+        try:
+            if compression == 'gzip':
+                self._file = gzip.GzipFile(
+                    fileobj=self._raw, mode=mode + 'b',
+                    compresslevel=9 if level is None else level)
+            elif compression == 'zstd':
+                import zstandard
+                compressor = zstandard.ZstdCompressor(
+                    level=3 if level is None else level)
+                self._file = compressor.stream_writer(self._raw)
+        except BaseException:
+            self._raw.close()
+            raise
+        self._buffer_size = buffer_size
+        self._ids = ids
+        self._chunks = []
+        self._buffered = 0
+        self.stats = WriteStats()
+        self._start = time.perf_counter()
+
+    def add(self, adj_list):
+        """Buffer a line, returning the buffered data once it is full"""
+        return self.add_line(dumpb(adj_list, ids=self._ids))
+
+    def add_line(self, line):
+        line += b'\n'
+        self._chunks.append(line)
+        self._buffered += len(line)
+        self.stats.lines += 1
+        self.stats.bytes += len(line)
+        if self._buffered >= self._buffer_size:
+            return self.take()
+        return None
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self._buffered = 0
+        return data
+
+    def write(self, data):
+        if data:
+            self._file.write(data)
+
+    def close(self):
+        try:
+            if self._file is not self._raw:
+                self._file.close()
+        finally:
+            self._raw.close()
+        self.stats.duration = time.perf_counter() - self._start
+
+
+def write(fpath, adj_lists, *, mode='w', compression=None, level=None,
+          buffer_size=DEFAULT_BUFFER_SIZE, ids=None):
+    """
+    Stream adjacency lists to a GraphSON file, one line per vertex. Only
+    one buffer of serialized lines is held in memory at a time.
+
+    :param str fpath: Output file path
+    :param adj_lists: Iterable of :py:class:`AdjList`, e.g. a generator
+    :param str mode: 'w' to overwrite the file, 'a' to append to it
+    :param str compression: None, 'gzip', or 'zstd' (requires the
+        zstandard package)
+    :param int level: Compression level, the codec's default if None
+    :param int buffer_size: Bytes buffered between writes
+    :param IdAllocator ids: Allocator of vertex property ids, a process
+        wide one by default
+
+    :returns: :py:class:`WriteStats`
+    """
+    sink = _Sink(fpath, mode, compression, level, buffer_size, ids)
+    try:
         for adj_list in adj_lists:
-            dumped = dumps(adj_list)
-            f.write(dumped + '\n')
+            sink.write(sink.add(adj_list))
+        sink.write(sink.take())
+    finally:
+        sink.close()
+    return sink.stats
+
+
+def write_lines(fpath, lines, *, mode='w', compression=None, level=None,
+                buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Like :py:func:`write`, for adjacency lists that are already encoded,
+    e.g. by :py:class:`~hobgoblin.fileio.adjacency.AdjacencyBuilder`.
+
+    :param lines: Iterable of UTF-8 encoded GraphSON documents, without
+        line terminators
+
+    :returns: :py:class:`WriteStats`
+    """
+    sink = _Sink(fpath, mode, compression, level, buffer_size, None)
+    try:
+        for line in lines:
+            sink.write(sink.add_line(line))
+        sink.write(sink.take())
+    finally:
+        sink.close()
+    return sink.stats
+
+
+async def write_async(fpath, adj_lists, *, mode='w', compression=None,
+                      level=None, buffer_size=DEFAULT_BUFFER_SIZE,
+                      ids=None, loop=None):
+    """
+    Like :py:func:`write`, but also accepts async iterables, e.g. a
+    :py:class:`ResultStream<hobgoblin.session.ResultStream>` based
+    generator. Full buffers are written in the loop's default executor, so
+    the next buffer is serialized while the previous one is written.
+
+    :returns: :py:class:`WriteStats`
+    """
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    sink = _Sink(fpath, mode, compression, level, buffer_size, ids)
+    pending = []
+
+    async def add(adj_list):
+        data = sink.add(adj_list)
+        if data:
+            if pending:
+                await pending.pop()
+            pending.append(loop.run_in_executor(None, sink.write, data))
+
+    try:
+        if hasattr(adj_lists, '__aiter__'):
+            async for adj_list in adj_lists:
+                await add(adj_list)
+        else:
+            for adj_list in adj_lists:
+                await add(adj_list)
+        if pending:
+            await pending.pop()
+        await loop.run_in_executor(None, sink.write, sink.take())
+    finally:
+        if pending:
+            await asyncio.wait(pending)
+        sink.close()
+    return sink.stats
+
+
+def dump(fpath, *adj_lists, mode="w"):
+    """
+    Convert Hobgoblin elements to GraphSON. See :py:func:`write` to stream
+    lazily produced adjacency lists.
+    """
+    write(fpath, adj_lists, mode=mode)
+
+
+MANIFEST = 'manifest.json'
 
+_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
 
-def dumps(adj_list):
-    """Convert Hobgoblin elements to GraphSON"""
-    vertex = _prep_vertex(adj_list.vertex)
+
+def export(dirpath, adj_lists, *, shard_size=100000, workers=None,
+           executor=None, id_stride=1 << 32, compression=None, level=None,
+           buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Export adjacency lists in parallel. The lists are split in shards of
+    `shard_size` that are written to their own part file by a pool of
+    worker processes, and a manifest listing the parts is written last.
+    Shard ``n`` numbers its vertex properties from ``n * id_stride``, so
+    ids never collide across parts. At most two shards per worker are held
+    in memory at a time.
+
+    Adjacency lists are pickled to be sent to the workers: their element
+    classes must be importable by them.
+
+    :param str dirpath: Output directory, created if missing
+    :param adj_lists: Iterable of :py:class:`AdjList`
+    :param int shard_size: Number of adjacency lists per part file
+    :param int workers: Number of worker processes, one per CPU by default
+    :param concurrent.futures.Executor executor: Executor to run shards
+        on instead of a new process pool
+    :param int id_stride: Size of the id range of each shard
+    :param str compression: See :py:func:`write`
+    :param int level: See :py:func:`write`
+    :param int buffer_size: See :py:func:`write`
+
+    :returns: dict, the manifest
+    """
+    if compression not in _SUFFIXES:
+        raise ValueError('Unknown compression: {}'.format(compression))
+    os.makedirs(dirpath, exist_ok=True)
+    if executor is None:
+        workers = workers or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            return export(
+                dirpath, adj_lists, shard_size=shard_size, workers=workers,
+                executor=pool, id_stride=id_stride, compression=compression,
+                level=level, buffer_size=buffer_size)
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    adj_lists = iter(adj_lists)
+    parts = []
+    futures = []
+    pending = set()
+    try:
+        for shard in itertools.count():
+            batch = list(itertools.islice(adj_lists, shard_size))
+            if not batch:
+                break
+            if len(pending) >= max_pending:
+                _, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            path = 'part-{:05d}.json{}'.format(shard, _SUFFIXES[compression])
+            start = shard * id_stride
+            future = executor.submit(
+                _write_shard, os.path.join(dirpath, path), batch, start,
+                start + id_stride, compression, level, buffer_size)
+            parts.append({'path': path, 'ids': [start, start + id_stride]})
+            futures.append(future)
+            pending.add(future)
+            del batch
+    finally:
+        concurrent.futures.wait(pending)
+    for part, future in zip(parts, futures):
+        stats = future.result()
+        part['lines'] = stats.lines
+        part['bytes'] = stats.bytes
+    manifest = {
+        'format': 'graphson-adjacency-list',
+        'compression': compression,
+        'lines': sum(part['lines'] for part in parts),
+        'parts': parts
+    }
+    with open(os.path.join(dirpath, MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def _write_shard(fpath, adj_lists, start, stop, compression, level,
+                 buffer_size):
+    return write(fpath, adj_lists, compression=compression, level=level,
+                 buffer_size=buffer_size, ids=IdAllocator(start, stop))
+
+
+def iter_load_export(dirpath, app=None, *, use_mmap=False):
+    """
+    Lazily read the adjacency lists of an :py:func:`export`, part by part.
+    See :py:func:`iter_load`.
+
+    :returns: Generator of :py:class:`AdjList`
+    """
+    with open(os.path.join(dirpath, MANIFEST)) as f:
+        manifest = json.load(f)
+    compression = manifest['compression']
+    for part in manifest['parts']:
+        yield from iter_load(
+            os.path.join(dirpath, part['path']), app,
+            compression=compression, use_mmap=use_mmap and not compression)
+
+
+def iter_load(fpath, app=None, *, compression=None, use_mmap=False):
+    """
+    Lazily read adjacency lists written by :py:func:`write`. Lines are read
+    and decoded one at a time as the generator is consumed, so memory use
+    doesn't depend on the file size.
+
+    Elements are instances of the classes registered with `app` for their
+    label, :py:class:`GenericVertex<hobgoblin.element.GenericVertex>` and
+    :py:class:`GenericEdge<hobgoblin.element.GenericEdge>` otherwise. The
+    far end of each edge is a generic vertex holding only its id.
+
+    :param str fpath: Input file path
+    :param hobgoblin.app.Hobgoblin app: App whose registry is used
+    :param str compression: None, 'gzip', or 'zstd' (requires the
+        zstandard package)
+    :param bool use_mmap: Read the file through a memory map, only for
+        uncompressed files
+
+    :returns: Generator of :py:class:`AdjList`
+    """
+    if compression not in (None,) + COMPRESSIONS:
+        raise ValueError('Unknown compression: {}'.format(compression))
+    if use_mmap and compression:
+        raise ValueError('Compressed files can not be memory mapped')
+    vertices = app.vertices if app is not None else {}
+    edges = app.edges if app is not None else {}
+    with open(fpath, 'rb') as f:
+        if use_mmap:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b''):
+                    if line.strip():
+                        yield loads(line, vertices, edges)
+            return
+        if compression == 'gzip':
+            f = gzip.GzipFile(fileobj=f, mode='rb')
+        elif compression == 'zstd':
+            import zstandard
+            f = io.BufferedReader(
+                zstandard.ZstdDecompressor().stream_reader(f))
+        for line in f:
+            if line.strip():
+                yield loads(line, vertices, edges)
+
+
+def load(fpath, app=None, **kwargs):
+    """
+    Read all adjacency lists written by :py:func:`write`, see
+    :py:func:`iter_load`.
+
+    :returns: list of :py:class:`AdjList`
+    """
+    return list(iter_load(fpath, app, **kwargs))
+
+
+def loads(line, vertices=None, edges=None):
+    """
+    Convert a line of GraphSON to Hobgoblin elements.
+
+    :param line: str or bytes
+    :param dict vertices: Maps labels to vertex classes
+    :param dict edges: Maps labels to edge classes
+
+    :returns: :py:class:`AdjList`
+    """
+    data = reader.toObject(json.loads(line))
+    vertex = _load_vertex(data, vertices or {})
+    in_edges = []
+    for label, items in data.get('inE', {}).items():
+        for item in items:
+            in_edges.append(_load_edge(
+                item, label, edges or {}, GenericVertex(), vertex))
+    out_edges = []
+    for label, items in data.get('outE', {}).items():
+        for item in items:
+            out_edges.append(_load_edge(
+                item, label, edges or {}, vertex, GenericVertex()))
+    return AdjList(vertex=vertex, inE=in_edges, outE=out_edges)
+
+
+def _load_vertex(data, vertices):
+    label = data['label']
+    vertex = vertices.get(label, GenericVertex)()
+    mapped = vertex.__mapping__.db_properties
+    props = {'id': data['id'], 'label': label}
+    for db_name, vps in data.get('properties', {}).items():
+        values = []
+        for vp in vps:
+            value = vp.get('value')
+            if value is None:
+                continue
+            # Meta-properties can only be set on mapped vertex properties
+            metaprops = _not_null(vp.get('properties', {}))
+            if metaprops and db_name in mapped:
+                value = dict(metaprops, key=db_name, value=value,
+                             id=vp.get('id'))
+            values.append(value)
+        if values:
+            props[db_name] = values
+    result = graph.Vertex(data['id'], label)
+    return _untracked(vertex.__mapping__.mapper_func(result, props, vertex))
+
+
+def _load_edge(data, label, edges, source, target):
+    edge = edges.get(label, GenericEdge)(source, target)
+    if 'outV' in data:
+        sid, tid = data['outV'], target.id
+    else:
+        sid, tid = source.id, data['inV']
+    props = _not_null(data.get('properties', {}))
+    props['id'] = data['id']
+    props['label'] = label
+    result = graph.Edge(data['id'], graph.Vertex(sid), label,
+                        graph.Vertex(tid))
+    return _untracked(edge.__mapping__.mapper_func(result, props, edge))
+
+
+def _untracked(element):
+    """
+    Undo the change tracking started by the mapper: loaded elements aren't
+    in sync with the db, saving them must write all their properties.
+    """
+    element.__dirty__ = None
+    for ogm_name, _, attr, _ in element.__mapping__.to_db_plan:
+        if attr is not None:
+            continue
+        val = getattr(element, ogm_name, None)
+        if isinstance(val, (list, set)):
+            for vp in val:
+                vp.__dirty__ = None
+        elif hasattr(val, '__mapping__'):
+            val.__dirty__ = None
+    return element
+
+
+def _not_null(props):
+    return {key: val for key, val in props.items() if val is not None}
+
+
+def dumps(adj_list, *, ids=None):
+    """
+    Convert Hobgoblin elements to GraphSON
+
+    :param IdAllocator ids: Allocator of vertex property ids, a process
+        wide one by default
+    """
+    return dumpb(adj_list, ids=ids).decode('utf-8')
+
+
+def dumpb(adj_list, *, ids=None):
+    """
+    Convert Hobgoblin elements to UTF-8 encoded GraphSON, with the
+    encoders compiled for their classes (see
+    :py:mod:`hobgoblin.fileio.encoders`).
+
+    :param IdAllocator ids: Allocator of vertex property ids, a process
+        wide one by default
+    """
+    if ids is None:
+        ids = _ids
+    v = adj_list.vertex
+    vertex = encoders.encoder(type(v)).encode(v, ids)
+    for direction, key, edges in (('inV', 'inE', adj_list.inE),
+                                  ('outV', 'outE', adj_list.outE)):
+        by_label = vertex[key]
+        for e in edges:
+            prepped = encoders.encoder(type(e)).encode(e, direction)
+            label = e.__label__
+            if label in by_label:
+                by_label[label].append(prepped)
+            else:
+                by_label[label] = [prepped]
+    return encoders.dumpb(vertex)
+
+
+def _dumps_reference(adj_list, ids):
+    """
+    Convert Hobgoblin elements to GraphSON, calling the writer for every
+    value. Reference for the compiled encoders.
+    """
+    vertex = _prep_vertex(adj_list.vertex, ids)
     for inE in adj_list.inE:
         prepped = _prep_edge(inE, "inV")
         label = inE.__label__
@@ -68,8 +580,7 @@ def _prep_edge(e, t):
     return edge
 
 
-def _prep_vertex(v):
-    global vp_id
+def _prep_vertex(v, ids):
     mapping = v.__mapping__
     properties = v.__properties__
     vertex = {
@@ -90,24 +601,24 @@ def _prep_vertex(v):
         vertex["properties"].setdefault(db_name, [])
         if isinstance(prop, VertexProperty):
             prop = getattr(v, ogm_name)
-            if isinstance(prop, ListVertexPropertyManager):
+            if isinstance(prop, VertexPropertyManager):
                 for p in prop:
                     value = p.value
-                    vp = _prep_vp(p, value, v, db_name)
-                    vp_id += 1
+                    vp = _prep_vp(p, value, ids.next_id())
                     vertex["properties"][db_name].append(vp)
                 continue
-            else:
+            elif prop is not None:
                 value = prop.value
+            else:
+                value = None
         else:
             value = getattr(v, ogm_name)
-        vp = _prep_vp(prop, value, v, db_name)
-        vp_id += 1
+        vp = _prep_vp(prop, value, ids.next_id())
         vertex["properties"][db_name].append(vp)
     return vertex
 
 
-def _prep_vp(prop, value, v, db_name):
+def _prep_vp(prop, value, vp_id):
     vp = {
             "id": {
                 "@type": "g:Int64",
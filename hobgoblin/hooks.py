@@ -0,0 +1,108 @@
+"""Observer interface for the requests sessions send to the server"""
+
+import time
+
+from gremlin_python.structure.io.graphsonV3d0 import GraphSONWriter
+
+
+class Observer:
+    """
+    Base class for observers registered with
+    :py:meth:`~hobgoblin.app.Hobgoblin.register_observer`.
+    All hooks do nothing by default. Hooks run inline with the session's
+    traffic, so they should be cheap.
+    """
+
+    def on_request(self, event):
+        """
+        Called before a request is sent.
+
+        :param RequestEvent event:
+        """
+
+    def on_response(self, event):
+        """
+        Called once all of a request's results have been received.
+
+        :param RequestEvent event:
+        """
+
+    def on_hydrate(self, event):
+        """
+        Called after results were mapped onto OGM elements.
+
+        :param HydrateEvent event:
+        """
+
+    def on_error(self, event):
+        """
+        Called when a request fails.
+
+        :param RequestEvent event:
+        """
+
+
+class RequestEvent:
+    """
+    A request sent by a session: either traversal bytecode or, in
+    ``op='eval'`` mode, a script and its bindings.
+
+    :ivar element_class: OGM class of the element being written, ``None``
+        for traversals
+    :ivar float duration: Seconds between the request and its last result
+        (or error), ``None`` until then
+    :ivar int count: Number of results received
+    :ivar Exception error: The error, for :py:meth:`Observer.on_error`
+    """
+
+    def __init__(self, bytecode=None, *, script=None, bindings=None,
+                 element_class=None):
+        self.bytecode = bytecode
+        self.script = script
+        self.bindings = bindings
+        self.element_class = element_class
+        self.start = time.perf_counter()
+        self.duration = None
+        self.count = 0
+        self.error = None
+        self._bytes_sent = None
+
+    @property
+    def bytes_sent(self):
+        """
+        Size of the GraphSON serialized request arguments. Computed on first
+        access, so observers that don't need it don't pay for it.
+        """
+        if self._bytes_sent is None:
+            if self.bytecode is not None:
+                request = self.bytecode
+            else:
+                request = {'gremlin': self.script, 'bindings': self.bindings}
+            data = GraphSONWriter().writeObject(request)
+            self._bytes_sent = len(data.encode('utf-8'))
+        return self._bytes_sent
+
+    @property
+    def bytes_received(self):
+        """Always ``None``: the driver doesn't expose response sizes"""
+        return None
+
+    def finish(self, *, error=None):
+        self.duration = time.perf_counter() - self.start
+        self.error = error
+
+
+class HydrateEvent:
+    """
+    Results mapped onto OGM elements.
+
+    :ivar element_class: Class of the hydrated element, ``None`` when a
+        batch of results was hydrated
+    :ivar int count: Number of hydrated elements
+    :ivar float duration: Seconds spent mapping, excluding requests
+    """
+
+    def __init__(self, element_class, count, duration):
+        self.element_class = element_class
+        self.count = count
+        self.duration = duration
@@ -0,0 +1,123 @@
+"""Identity maps that hold the elements belonging to a session"""
+
+import collections
+import collections.abc
+import weakref
+
+
+class IdentityMap(collections.abc.MutableMapping):
+    """
+    Maps hashable element ids to OGM elements. Unbounded, holds strong
+    references to every element. Counts lookup hits/misses so maps can be
+    sized; subclasses also count evictions.
+    """
+
+    def __init__(self):
+        self._elements = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def hits(self):
+        """Number of lookups that found an element"""
+        return self._hits
+
+    @property
+    def misses(self):
+        """Number of lookups that didn't find an element"""
+        return self._misses
+
+    @property
+    def evictions(self):
+        """Number of elements dropped by the map itself"""
+        return self._evictions
+
+    def __getitem__(self, key):
+        try:
+            element = self._elements[key]
+        except KeyError:
+            self._misses += 1
+            raise
+        self._hits += 1
+        return element
+
+    def __setitem__(self, key, element):
+        self._elements[key] = element
+
+    def __delitem__(self, key):
+        del self._elements[key]
+
+    def __contains__(self, key):
+        return key in self._elements
+
+    def __iter__(self):
+        return iter(self._elements)
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __repr__(self):
+        return '<{}(size={}, hits={}, misses={}, evictions={})>'.format(
+            self.__class__.__name__, len(self), self._hits, self._misses,
+            self._evictions)
+
+
+class LRUIdentityMap(IdentityMap):
+    """
+    Identity map holding at most `maxsize` elements. The least recently
+    used element is evicted when full.
+
+    :param int maxsize: Maximum number of elements
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self._elements = collections.OrderedDict()
+        self._maxsize = maxsize
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def __getitem__(self, key):
+        element = super().__getitem__(key)
+        self._elements.move_to_end(key)
+        return element
+
+    def __setitem__(self, key, element):
+        self._elements[key] = element
+        self._elements.move_to_end(key)
+        while len(self._elements) > self._maxsize:
+            self._elements.popitem(last=False)
+            self._evictions += 1
+
+
+class WeakIdentityMap(IdentityMap):
+    """
+    Identity map holding weak references. Elements disappear from the map
+    once nothing else references them.
+    """
+
+    def __getitem__(self, key):
+        try:
+            element = self._elements[key]()
+        except KeyError:
+            element = None
+        if element is None:
+            self._misses += 1
+            raise KeyError(key)
+        self._hits += 1
+        return element
+
+    def __setitem__(self, key, element):
+        def evict(ref, key=key):
+            if self._elements.get(key) is ref:
+                del self._elements[key]
+                self._evictions += 1
+
+        self._elements[key] = weakref.ref(element, evict)
+
+    def __contains__(self, key):
+        ref = self._elements.get(key)
+        return ref is not None and ref() is not None
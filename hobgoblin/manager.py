@@ -1,16 +1,49 @@
 """Managers for multi cardinality vertex properties"""
 
+import weakref
+
 
 class VertexPropertyManager:
+    # Slots are declared by the concrete list/set subclasses
+    __slots__ = ()
+
     def __init__(self, data_type, vertex_prop, card):
         self._data_type = data_type
         self._vertex_prop = vertex_prop
         self._card = card
-        self._mapper_func = vertex_prop.__mapping__.mapper_func
+        self._owner = None
+        self._name = None
 
     @property
     def mapper_func(self):
-        return self._mapper_func
+        return self._vertex_prop.__mapping__.mapper_func
+
+    def bind(self, owner, name):
+        """Attach to the element property so mutations are tracked"""
+        self._owner = weakref.ref(owner)
+        self._name = name
+
+    def __reduce__(self):
+        # The owner is only weakly referenced, pickle it as a strong
+        # reference so that the unpickled manager is bound again
+        owner = self._owner() if self._owner else None
+        args = (self._data_type, self._vertex_prop, self._card, list(self))
+        return type(self), args, (owner, self._name)
+
+    def __setstate__(self, state):
+        owner, name = state
+        if owner is not None:
+            self.bind(owner, name)
+
+    def _mark_dirty(self):
+        owner = self._owner() if self._owner else None
+        dirty = getattr(owner, '__dirty__', None)
+        if dirty is None:
+            return
+        if isinstance(dirty, frozenset):
+            owner.__dirty__ = {self._name}
+        else:
+            dirty.add(self._name)
 
     def __call__(self, val):
         results = []
@@ -25,27 +58,73 @@ class VertexPropertyManager:
 
 
 class ListVertexPropertyManager(list, VertexPropertyManager):
+    __slots__ = ('_data_type', '_vertex_prop', '_card', '_owner', '_name',
+                 '_vp_map')
+
     def __init__(self, data_type, vertex_prop, card, obj):
         VertexPropertyManager.__init__(self, data_type, vertex_prop, card)
         list.__init__(self, obj)
-        self._vp_map = {}
+        self._vp_map = None
 
     @property
     def vp_map(self):
+        if self._vp_map is None:
+            self._vp_map = {}
         return self._vp_map
 
     def append(self, val):
         vp = self._vertex_prop(self._data_type, card=self._card)
         vp.value = self._data_type.validate(val)
         super().append(vp)
+        self._mark_dirty()
+
+    def remove(self, vp):
+        super().remove(vp)
+        self._mark_dirty()
+
+    def pop(self, *args):
+        vp = super().pop(*args)
+        self._mark_dirty()
+        return vp
+
+    def clear(self):
+        super().clear()
+        self._mark_dirty()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._mark_dirty()
 
 
 class SetVertexPropertyManager(set, VertexPropertyManager):
+    __slots__ = ('_data_type', '_vertex_prop', '_card', '_owner', '_name')
+
     def __init__(self, data_type, vertex_prop, card, obj):
         VertexPropertyManager.__init__(self, data_type, vertex_prop, card)
         set.__init__(self, obj)
 
+    # set defines its own
+    __reduce__ = VertexPropertyManager.__reduce__
+
     def add(self, val):
         vp = self._vertex_prop(self._data_type, card=self._card)
         vp.value = self._data_type.validate(val)
         super().add(vp)
+        self._mark_dirty()
+
+    def remove(self, vp):
+        super().remove(vp)
+        self._mark_dirty()
+
+    def discard(self, vp):
+        super().discard(vp)
+        self._mark_dirty()
+
+    def pop(self):
+        vp = super().pop()
+        self._mark_dirty()
+        return vp
+
+    def clear(self):
+        super().clear()
+        self._mark_dirty()
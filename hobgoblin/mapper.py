@@ -7,19 +7,39 @@ from hobgoblin import exception
 
 logger = logging.getLogger(__name__)
 
+# __dirty__ of clean elements, shared to avoid a set per element
+CLEAN = frozenset()
 
-def map_props_to_db(element, mapping):
-    """Convert OGM property names/values to DB property names/values"""
+
+def map_props_to_db(element, mapping, *, changed_only=False):
+    """
+    Convert OGM property names/values to DB property names/values
+
+    :param bool changed_only: Only emit properties changed since the element
+        was last loaded or saved. Untracked elements emit all properties.
+        Properties that weren't fetched and weren't set are never emitted.
+    """
     property_tuples = []
-    props = mapping.ogm_properties
-    for ogm_name, (db_name, data_type) in props.items():
-        val = getattr(element, ogm_name, None)
+    dirty = getattr(element, '__dirty__', None)
+    loaded = getattr(element, '__loaded__', None)
+    for ogm_name, db_name, attr, to_db in mapping.to_db_plan:
+        if dirty is not None and ogm_name not in dirty:
+            # Unchanged properties that were never fetched can't be read
+            if loaded is not None and ogm_name not in loaded:
+                continue
+            val = _read(element, ogm_name, attr)
+            if changed_only and not _has_dirty_metaprops(val):
+                continue
+        else:
+            val = _read(element, ogm_name, attr)
         if val and isinstance(val, (list, set)):
             card = None
             for v in val:
                 metaprops = get_metaprops(v, v.__mapping__)
-                property_tuples.append((card, db_name, data_type.to_db(
-                    v.value), metaprops))
+                db_val = v.value
+                if to_db is not None:
+                    db_val = to_db(db_val)
+                property_tuples.append((card, db_name, db_val, metaprops))
                 card = v.cardinality
         else:
             if hasattr(val, '__mapping__'):
@@ -27,17 +47,77 @@ def map_props_to_db(element, mapping):
                 val = val.value
             else:
                 metaprops = None
-            property_tuples.append((None, db_name, data_type.to_db(val),
-                                    metaprops))
+            if to_db is not None:
+                val = to_db(val)
+            property_tuples.append((None, db_name, val, metaprops))
     return property_tuples
 
 
+def _read(element, ogm_name, attr):
+    """
+    Read a property, from its instance attribute `attr` if set. Otherwise
+    fall back to the descriptor, for defaults and unloaded properties.
+    """
+    if attr is not None:
+        try:
+            return getattr(element, attr)
+        except AttributeError:
+            pass
+    return getattr(element, ogm_name, None)
+
+
+def _write(element, db_name, value, plan):
+    """Set the property mapped to `db_name` from a db value"""
+    try:
+        name, attr, to_ogm, validate = plan[db_name]
+    except KeyError:
+        setattr(element, db_name, value)
+        return
+    if to_ogm is not None:
+        value = to_ogm(value)
+    if attr is not None:
+        # Same as the descriptor minus change tracking, callers mark the
+        # element clean
+        setattr(element, attr, validate(value))
+    else:
+        setattr(element, name, value)
+
+
+def _has_dirty_metaprops(val):
+    if isinstance(val, (list, set)):
+        return any(vp.__dirty__ for vp in val)
+    return bool(getattr(val, '__dirty__', None))
+
+
+def mark_clean(element):
+    """
+    Start tracking changes on an element (and its vertex properties) that
+    is now in sync with the db. Clean elements share :py:data:`CLEAN`,
+    :py:func:`mark_dirty<hobgoblin.properties.mark_dirty>` replaces it.
+    """
+    element.__dirty__ = CLEAN
+    loaded = element.__loaded__
+    for ogm_name, _, attr, _ in element.__mapping__.to_db_plan:
+        # Only vertex properties track changes themselves
+        if attr is not None:
+            continue
+        if loaded is not None and ogm_name not in loaded:
+            continue
+        val = getattr(element, ogm_name, None)
+        if isinstance(val, (list, set)):
+            for vp in val:
+                vp.__dirty__ = CLEAN
+        elif hasattr(val, '__mapping__'):
+            val.__dirty__ = CLEAN
+
+
 def get_metaprops(vertex_property, mapping):
-    props = mapping.ogm_properties
     metaprops = {}
-    for ogm_name, (db_name, data_type) in props.items():
-        val = getattr(vertex_property, ogm_name, None)
-        metaprops[db_name] = data_type.to_db(val)
+    for ogm_name, db_name, attr, to_db in mapping.to_db_plan:
+        val = _read(vertex_property, ogm_name, attr)
+        if to_db is not None:
+            val = to_db(val)
+        metaprops[db_name] = val
     return metaprops
 
 
@@ -45,6 +125,7 @@ def map_vertex_to_ogm(result, props, element, *, mapping=None):
     """Map a vertex returned by DB to OGM vertex"""
     props.pop('id')
     label = props.pop('label')
+    plan = mapping.to_ogm_plan
     for db_name, value in props.items():
         metaprops = []
         if len(value) > 1:
@@ -71,19 +152,20 @@ def map_vertex_to_ogm(result, props, element, *, mapping=None):
                     value['id'] = vid
                     metaprops.append((val, value))
                 value = val
-        name, data_type = mapping.db_properties.get(db_name, (db_name, None))
-        if data_type:
-            value = data_type.to_ogm(value)
-        setattr(element, name, value)
+        _write(element, db_name, value, plan)
         if metaprops:
+            name = plan[db_name][0] if db_name in plan else db_name
             vert_prop = getattr(element, name)
             if hasattr(vert_prop, 'mapper_func'):
                 # Temporary hack for managers
                 vert_prop.mapper_func(metaprops, vert_prop)
             else:
                 vert_prop.__mapping__.mapper_func(metaprops, vert_prop)
-    setattr(element, '__label__', label)
+    # The class label is shared, don't store it on every instance
+    if label != element.__label__:
+        element.__label__ = label
     setattr(element, 'id', result.id)
+    mark_clean(element)
     return element
 
 
@@ -116,23 +198,19 @@ def map_vertex_property_to_ogm(result, element, *, mapping=None):
         else:
             current = element
         for db_name, value in metaprops.items():
-            name, data_type = mapping.db_properties.get(
-                db_name, (db_name, None))
-            if data_type:
-                value = data_type.to_ogm(value)
-            setattr(current, name, value)
+            _write(current, db_name, value, mapping.to_ogm_plan)
 
 
 def map_edge_to_ogm(result, props, element, *, mapping=None):
     """Map an edge returned by DB to OGM edge"""
     props.pop('id')
     label = props.pop('label')
+    plan = mapping.to_ogm_plan
     for db_name, value in props.items():
-        name, data_type = mapping.db_properties.get(db_name, (db_name, None))
-        if data_type:
-            value = data_type.to_ogm(value)
-        setattr(element, name, value)
-    setattr(element, '__label__', label)
+        _write(element, db_name, value, plan)
+    # The class label is shared, don't store it on every instance
+    if label != element.__label__:
+        element.__label__ = label
     setattr(element, 'id', result.id)
     # Currently not included in graphson
     # setattr(element.source, '__label__', result.outV.label)
@@ -149,6 +227,7 @@ def map_edge_to_ogm(result, props, element, *, mapping=None):
         element.target = GenericVertex()
     setattr(element.source, 'id', sid)
     setattr(element.target, 'id', tid)
+    mark_clean(element)
     return element
 
 
@@ -177,6 +256,16 @@ def create_mapping(namespace, properties):
     return mapping
 
 
+def _conversion(data_type, method):
+    """The data type's conversion, ``None`` if it is an identity"""
+    from hobgoblin import properties
+    func = getattr(data_type, method)
+    if getattr(func, '__func__', None) in properties.IDENTITY_CONVERSIONS:
+        if method == 'to_ogm' or getattr(data_type, '_val', None) is None:
+            return None
+    return func
+
+
 class Mapping:
     """
     This class stores the information necessary to map between an OGM element
@@ -189,6 +278,8 @@ class Mapping:
         self._mapper_func = functools.partial(mapper_func, mapping=self)
         self._db_properties = {}
         self._ogm_properties = {}
+        self._to_ogm_plan = {}
+        self._to_db_plan = []
         self._map_properties(properties)
 
     @property
@@ -211,6 +302,24 @@ class Mapping:
         """A dictionary of property mappings"""
         return self._ogm_properties
 
+    @property
+    def to_ogm_plan(self):
+        """
+        Maps db names to (ogm name, instance attribute, to_ogm, validate)
+        tuples used to hydrate elements. The attribute is ``None`` for
+        properties that must be set through their descriptor, and to_ogm
+        ``None`` when it is an identity conversion.
+        """
+        return self._to_ogm_plan
+
+    @property
+    def to_db_plan(self):
+        """
+        (ogm name, db name, instance attribute, to_db) tuples used to write
+        elements, see :py:attr:`to_ogm_plan`.
+        """
+        return self._to_db_plan
+
     def __getattr__(self, value):
         try:
             mapping, _ = self._ogm_properties[value]
@@ -220,8 +329,9 @@ class Mapping:
                 "unrecognized property {} for class: {}".format(
                     value, self._element_type))
 
-    def _map_properties(self, properties):
-        for name, prop in properties.items():
+    def _map_properties(self, props):
+        from hobgoblin import properties
+        for name, prop in props.items():
             data_type = prop.data_type
             if prop.db_name:
                 db_name = prop.db_name
@@ -233,6 +343,14 @@ class Mapping:
                         'Only vertices can have vertex properties')
             self._db_properties[db_name] = (name, data_type)
             self._ogm_properties[name] = (db_name, data_type)
+            attr = validate = None
+            if prop.__descriptor__ is properties.PropertyDescriptor:
+                attr = '_' + name
+                validate = data_type.validate
+            to_ogm = _conversion(data_type, 'to_ogm')
+            to_db = _conversion(data_type, 'to_db')
+            self._to_ogm_plan[db_name] = (name, attr, to_ogm, validate)
+            self._to_db_plan.append((name, db_name, attr, to_db))
 
     def __repr__(self):
         return '<{}(type={}, label={}, properties={})>'.format(
@@ -0,0 +1,149 @@
+"""Pool of remote connections reused by an app's sessions"""
+
+import collections
+import time
+
+import aiogremlin
+
+
+class PooledConnection:
+    """
+    A remote connection together with the objects sessions build on top of
+    it, so that they are only created once.
+
+    :param aiogremlin.DriverRemoteConnection remote_connection:
+    """
+
+    def __init__(self, remote_connection):
+        self.remote_connection = remote_connection
+        self.graph = aiogremlin.Graph()
+        self.source = self.graph.traversal().withRemote(remote_connection)
+        # Client used by op='eval' sessions, created on first use. Clients
+        # share the connections of the app's cluster, closing one would
+        # close the cluster
+        self.script_client = None
+        self.released_at = None
+
+
+class SessionPool:
+    """
+    Keeps idle remote connections ready for new sessions. Sessions borrow a
+    connection when they are created and return it when they are closed, or
+    garbage collected.
+    Borrowing never waits: a new connection is opened when none is idle.
+    Dropped connections are closed on the next borrow, or when the pool is
+    closed.
+
+    :param factory: Coroutine function opening a new remote connection
+    :param int minsize: Number of idle connections that are always kept
+    :param int maxsize: Maximum number of idle connections kept, surplus
+        connections are dropped when returned
+    :param float idle_timeout: Seconds after which idle connections in
+        excess of `minsize` are dropped, ``None`` for never
+    :param clock: Callable returning the current time in seconds
+    """
+
+    def __init__(self, factory, *, minsize=0, maxsize=10, idle_timeout=None,
+                 clock=time.monotonic):
+        self._factory = factory
+        self._minsize = minsize
+        self._maxsize = maxsize
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        self._available = collections.deque()
+        self._acquired = set()
+        self._dropped = []
+        self._opened = 0
+        self._closed = False
+
+    @property
+    def minsize(self):
+        return self._minsize
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def idle_timeout(self):
+        return self._idle_timeout
+
+    @property
+    def acquired(self):
+        """Number of borrowed connections"""
+        return len(self._acquired)
+
+    @property
+    def opened(self):
+        """Number of connections opened by the pool"""
+        return self._opened
+
+    async def init_pool(self):
+        """Open connections until `minsize` are idle"""
+        while len(self._available) < self._minsize:
+            conn = await self._open()
+            conn.released_at = self._clock()
+            self._available.append(conn)
+
+    async def acquire(self):
+        """
+        Borrow the most recently returned connection, or open a new one.
+
+        :returns: :py:class:`PooledConnection`
+        """
+        self._expire()
+        await self._close_dropped()
+        if self._available:
+            conn = self._available.pop()
+        else:
+            conn = await self._open()
+        self._acquired.add(conn)
+        return conn
+
+    def release(self, conn):
+        """Return a borrowed connection"""
+        if self._closed:
+            # Closed with the pool
+            return
+        self._acquired.discard(conn)
+        if len(self._available) < self._maxsize:
+            conn.released_at = self._clock()
+            self._available.append(conn)
+        else:
+            self._dropped.append(conn)
+        self._expire()
+
+    async def close(self):
+        """
+        Close all connections, including those still borrowed: sessions
+        shouldn't outlive their app.
+        """
+        self._closed = True
+        self._dropped.extend(self._available)
+        self._dropped.extend(self._acquired)
+        self._available.clear()
+        self._acquired.clear()
+        await self._close_dropped()
+
+    async def _open(self):
+        conn = PooledConnection(await self._factory())
+        self._opened += 1
+        return conn
+
+    def _expire(self):
+        if self._idle_timeout is None:
+            return
+        deadline = self._clock() - self._idle_timeout
+        # Least recently returned connections are on the left
+        while (len(self._available) > self._minsize
+               and self._available[0].released_at <= deadline):
+            self._dropped.append(self._available.popleft())
+
+    async def _close_dropped(self):
+        dropped, self._dropped = self._dropped, []
+        for conn in dropped:
+            await conn.remote_connection.close()
+
+    def __len__(self):
+        """Number of idle connections"""
+        return len(self._available)
@@ -13,6 +13,33 @@ def noop_factory(x, y):
     return None
 
 
+def check_loaded(obj, name):
+    """
+    Raise if property `name` of a lazily or partially loaded `obj` hasn't
+    been fetched from the db.
+    """
+    loaded = getattr(obj, '__loaded__', None)
+    if loaded is not None and name not in loaded:
+        raise exception.NotLoadedError(
+            "Property {} of {} is not loaded, use Session.load".format(
+                name, obj.__class__.__name__))
+
+
+def mark_dirty(obj, name):
+    """
+    Record that property `name` of `obj` changed since it was last loaded
+    or saved. Elements that were never loaded/saved are not tracked.
+    """
+    dirty = getattr(obj, '__dirty__', None)
+    if dirty is None:
+        return
+    if isinstance(dirty, frozenset):
+        # Clean elements share an empty frozenset
+        obj.__dirty__ = {name}
+    else:
+        dirty.add(name)
+
+
 class PropertyDescriptor:
     """
     Descriptor that validates user property input and gets/sets properties
@@ -28,10 +55,16 @@ class PropertyDescriptor:
     def __get__(self, obj, objtype):
         if obj is None:
             return getattr(objtype.__mapping__, self._prop_name)
-        return getattr(obj, self._name, self._default)
+        try:
+            return getattr(obj, self._name)
+        except AttributeError:
+            check_loaded(obj, self._prop_name)
+            return self._default
 
     def __set__(self, obj, val):
         val = self._data_type.validate(val)
+        if getattr(obj, self._name, None) != val:
+            mark_dirty(obj, self._prop_name)
         setattr(obj, self._name, val)
 
     def __delete__(self, obj):
@@ -220,3 +253,10 @@ class Boolean(abc.DataType):
 
     def to_ogm(self, val):
         return super().to_ogm(val)
+
+
+# Conversions returning their argument unchanged (``to_db`` only when no
+# value is bound to the data type). Mappings skip calls to them.
+IDENTITY_CONVERSIONS = frozenset(
+    func for data_type in (Generic, String, Integer, Float, Boolean)
+    for func in (data_type.to_db, data_type.to_ogm))
@@ -0,0 +1,121 @@
+"""
+Canonical parameterized Gremlin scripts used by sessions in ``op='eval'``
+mode. The script text never depends on the element or its properties: all
+values, labels included, are passed as bindings, so Gremlin Server compiles
+each script once and reuses it for every write.
+"""
+
+from gremlin_python.process.traversal import Cardinality
+
+# Sets the properties described by `items` on `e`
+_SET_PROPERTIES = """
+for (p in items) {
+    def metas = []
+    p.meta.each { k, v -> metas << k << v }
+    if (p.card) {
+        e.property(VertexProperty.Cardinality.valueOf(p.card), p.key,
+                   p.value, *metas)
+    } else {
+        e.property(p.key, p.value, *metas)
+    }
+}
+"""
+
+# For use in format strings
+_SET_PROPERTIES_FMT = _SET_PROPERTIES.replace('{', '{{').replace('}', '}}')
+
+_PROJECT_VERTEX = """\
+g.V(e).project('id', 'label', 'properties').\
+by(__.id()).by(__.label()).\
+by(__.properties().project('id', 'key', 'value', 'meta').\
+by(__.id()).by(__.key()).by(__.value()).by(__.valueMap()).fold()).next()"""
+
+_PROJECT_EDGE = """\
+g.E(e).project('id', 'label', 'outV', 'inV', 'properties').\
+by(__.id()).by(__.label()).by(__.outV().id()).by(__.inV().id()).\
+by(__.valueMap()).next()"""
+
+_CREATE_VERTEX = "g.addV(label).next()"
+
+_CREATE_EDGE = "g.V(sid).next().addEdge(label, g.V(tid).next())"
+
+_CREATE = """\
+def e = {create}
+def items = props
+""" + _SET_PROPERTIES_FMT + "{project}"
+
+# Existing elements get the properties named in `drop` (all of them if it is
+# null) replaced by `update`. Missing ones are created with `props`. The
+# result is the hydration row if `project` is set, the element id otherwise.
+_UPSERT = """\
+def found = g.{step}(eid).tryNext()
+def e
+def items
+if (found.isPresent()) {{
+    e = found.get()
+    if (drop == null) {{
+        e.properties().each {{ it.remove() }}
+    }} else {{
+        for (k in drop) {{ e.properties(k).each {{ it.remove() }} }}
+    }}
+    items = update
+}} else {{
+    e = {create}
+    items = props
+}}
+""" + _SET_PROPERTIES_FMT + "project ? {project} : e.id()"
+
+_DELETE = "g.{step}(eid).drop().iterate()"
+
+VERTEX_SCRIPTS = {
+    'create': _CREATE.format(create=_CREATE_VERTEX, project=_PROJECT_VERTEX),
+    'upsert': _UPSERT.format(
+        step='V', create=_CREATE_VERTEX, project=_PROJECT_VERTEX),
+    'delete': _DELETE.format(step='V')
+}
+
+EDGE_SCRIPTS = {
+    'create': _CREATE.format(create=_CREATE_EDGE, project=_PROJECT_EDGE),
+    'upsert': _UPSERT.format(
+        step='E', create=_CREATE_EDGE, project=_PROJECT_EDGE),
+    'delete': _DELETE.format(step='E')
+}
+
+_CARDINALITIES = {
+    Cardinality.single: 'single',
+    Cardinality.list_: 'list',
+    Cardinality.set_: 'set'
+}
+
+
+def script(element, op):
+    """
+    Get the canonical script for an operation on `element`.
+
+    :param str op: One of 'create', 'upsert' and 'delete'
+
+    :returns: str
+    """
+    if element.__type__ == 'vertex':
+        return VERTEX_SCRIPTS[op]
+    return EDGE_SCRIPTS[op]
+
+
+def property_bindings(props):
+    """
+    Convert db property tuples, as returned by
+    :py:func:`map_props_to_db<hobgoblin.mapper.map_props_to_db>`, to the
+    list of property maps read by the scripts. Null values are skipped.
+
+    :returns: list
+    """
+    bindings = []
+    for card, db_name, val, metaprops in props:
+        if val is not None:
+            bindings.append({
+                'card': _CARDINALITIES.get(card),
+                'key': db_name,
+                'value': val,
+                'meta': dict(metaprops or {})
+            })
+    return bindings
@@ -2,24 +2,25 @@
 
 import asyncio
 import collections
+import functools
 import logging
+import time
 import weakref
 
 import aiogremlin
 from aiogremlin.driver.protocol import Message
 from aiogremlin.driver.resultset import ResultSet
-from aiogremlin.process.graph_traversal import __
+from aiogremlin.process.graph_traversal import AsyncGraphTraversal, __
 from gremlin_python.driver.remote_connection import RemoteTraversal
 from gremlin_python.process.traversal import Binding, Cardinality, Traverser
-from gremlin_python.structure.graph import Edge, Vertex
+from gremlin_python.structure.graph import Edge, Path, Vertex
 
-from hobgoblin import exception, mapper
+from hobgoblin import columnar, exception, hooks, identity, mapper, scripts
 from hobgoblin.element import GenericEdge, GenericVertex, VertexProperty
 from hobgoblin.manager import VertexPropertyManager
 
 logger = logging.getLogger(__name__)
 
-
 def bindprop(element_class, ogm_name, val, *, binding=None):
     """
     Helper function for binding ogm properties/values to corresponding db
@@ -40,6 +41,248 @@ def bindprop(element_class, ogm_name, val, *, binding=None):
     return db_name, val
 
 
+def _drained(traversers):
+    """
+    Whether the driver has no more results buffered, i.e. getting the next
+    one means waiting for the server's next response.
+    """
+    stream = getattr(traversers, 'stream', None)
+    return stream is not None and stream.empty()
+
+
+def _project_vertex(traversal, keys=()):
+    """
+    Append the projection used to hydrate vertices. Yields id, label and
+    properties (including meta-properties) in a single response.
+
+    :param tuple keys: Only project these db properties, all if empty
+    """
+    return traversal.project('id', 'label', 'properties') \
+                    .by(__.id()).by(__.label()) \
+                    .by(__.properties(*keys)
+                          .project('id', 'key', 'value', 'meta')
+                          .by(__.id()).by(__.key()).by(__.value())
+                          .by(__.valueMap()).fold())
+
+
+def _project_edge(traversal, keys=()):
+    """
+    Append the projection used to hydrate edges. Yields id, label, endpoint
+    ids and properties in a single response.
+
+    :param tuple keys: Only project these db properties, all if empty
+    """
+    return traversal.project('id', 'label', 'outV', 'inV', 'properties') \
+                    .by(__.id()).by(__.label()) \
+                    .by(__.outV().id()).by(__.inV().id()) \
+                    .by(__.valueMap(*keys))
+
+
+def _vertex_from_row(row):
+    """Build the (result, props) pair expected by the vertex mapper"""
+    vid = row['id']
+    props = {'label': row['label'], 'id': vid}
+    for prop in row['properties']:
+        key = prop['key']
+        val = prop['value']
+        meta = prop['meta']
+        props.setdefault(key, [])
+        if meta:
+            meta['key'] = key
+            meta['value'] = val
+            meta['id'] = prop['id']
+            val = meta
+        props[key].append(val)
+    return Vertex(vid, row['label']), props
+
+
+def _edge_from_row(row):
+    """Build the (result, props) pair expected by the edge mapper"""
+    props = dict(row['properties'])
+    props['id'] = row['id']
+    props['label'] = row['label']
+    result = Edge(row['id'], Vertex(row['outV']), row['label'],
+                  Vertex(row['inV']))
+    return result, props
+
+
+def _add_property_steps(traversal, props, *, prefix=''):
+    """
+    Append a property step for each non-null db property tuple. Keys,
+    values and meta-property values are bound (see
+    :py:func:`_property_bindings`), so the bytecode only depends on the
+    shape of `props`.
+    """
+    binding = 0
+    for card, db_name, val, metaprops in props:
+        if not metaprops:
+            metaprops = {}
+        if val is not None:
+            name = prefix + str(binding)
+            key = ('k' + name, db_name)
+            val = ('v' + name, val)
+            metas = []
+            for i, (meta_key, meta_val) in enumerate(metaprops.items()):
+                metas.append(meta_key)
+                metas.append(('m{}_{}'.format(name, i), meta_val))
+            if card:
+                # Maybe use a dict here as a translator
+                if card == Cardinality.list_:
+                    card = Cardinality.list_
+                elif card == Cardinality.set_:
+                    card = Cardinality.set_
+                else:
+                    card = Cardinality.single
+                traversal = traversal.property(card, key, val, *metas)
+            else:
+                traversal = traversal.property(key, val, *metas)
+            binding += 1
+    return traversal
+
+
+def _property_bindings(props, *, prefix=''):
+    """The binding values used by :py:func:`_add_property_steps`"""
+    bindings = {}
+    binding = 0
+    for card, db_name, val, metaprops in props:
+        if val is not None:
+            name = prefix + str(binding)
+            bindings['k' + name] = db_name
+            bindings['v' + name] = val
+            for i, meta_val in enumerate((metaprops or {}).values()):
+                bindings['m{}_{}'.format(name, i)] = meta_val
+            binding += 1
+    return bindings
+
+
+def _props_shape(props):
+    """
+    Key identifying the steps generated for db property tuples: the tuples
+    without their values.
+    """
+    return tuple((card, db_name, val is None, tuple(metaprops or ()))
+                 for card, db_name, val, metaprops in props)
+
+
+def _replace_property_steps(traversal, props, *, prefix=''):
+    """
+    Replace the db properties named in `props`: existing values of each key
+    are dropped, then the non-null values are added.
+    """
+    for db_name in collections.OrderedDict.fromkeys(p[1] for p in props):
+        traversal = traversal.sideEffect(__.properties(db_name).drop())
+    return _add_property_steps(traversal, props, prefix=prefix)
+
+
+def _chunks(elements, size):
+    for i in range(0, len(elements), size):
+        yield elements[i:i + size]
+
+
+class _TraversalRemote:
+    """
+    Remote connection used by traversals that were created with non-default
+    result options. Submits through the session with those options.
+    """
+
+    def __init__(self, session, **options):
+        self._session = session
+        self._options = options
+
+    async def submit(self, bytecode):
+        return await self._session.submit(bytecode, **self._options)
+
+
+class ResultStream:
+    """
+    Async iterator over hydrated traversal results that applies
+    backpressure: results are only read from the driver when the consumer
+    asks for them. Up to `prefetch` results are read ahead and hydrated
+    together, so at most `prefetch` hydrated results are buffered.
+
+    Note that the driver may still buffer raw, undeserialized responses.
+
+    :param Session session: Session used to hydrate elements
+    :param traversers: Async iterator over raw results
+    :param int prefetch: Read-ahead depth
+    :param dict options: Hydration options, see :py:meth:`Session.traversal`
+    :param hobgoblin.hooks.RequestEvent event: Event completed once the
+        results are exhausted
+    """
+
+    def __init__(self, session, traversers, prefetch, options=None,
+                 event=None):
+        self._session = session
+        self._traversers = traversers
+        self._prefetch = max(prefetch, 1)
+        self._options = options or {}
+        self._event = event
+        self._buffer = collections.deque()
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            await self._fill()
+        if not self._buffer:
+            raise StopAsyncIteration
+        return self._buffer.popleft()
+
+    async def one(self):
+        """Get a single result, or ``None`` when exhausted"""
+        try:
+            return await self.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    async def all(self):
+        """Get all remaining results"""
+        results = []
+        async for result in self:
+            results.append(result)
+        return results
+
+    async def _fill(self):
+        batch = []
+        while not self._done and len(batch) < self._prefetch:
+            try:
+                batch.append(await self._traversers.__anext__())
+            except StopAsyncIteration:
+                self._done = True
+                if self._event is not None:
+                    self._session._respond(self._event)
+            except Exception as e:
+                if self._event is not None:
+                    self._session._fail(self._event, e)
+                raise
+        if self._event is not None:
+            self._event.count += len(batch)
+        if batch:
+            results = await self._session._deserialize_results(
+                batch, **self._options)
+            self._buffer.extend(results)
+
+
+class _Loader:
+    """
+    Keeps track of lazily hydrated sibling elements, and of the db
+    properties they should load (all if `only` is ``None``). Siblings are
+    weakly referenced and dropped once loaded, so that the loader doesn't
+    keep elements evicted from the identity map alive.
+    """
+
+    def __init__(self, only=None):
+        self.only = only
+        self.elements = weakref.WeakSet()
+
+    def detach(self, element):
+        """Forget a loaded element"""
+        self.elements.discard(element)
+        element.__loader__ = None
+
+
 class Session:
     """
     Provides the main API for interacting with the database. Does not
@@ -48,17 +291,50 @@ class Session:
 
     :param hobgoblin.app.Hobgoblin app:
     :param aiogremlin.driver.connection.Connection conn:
+    :param int hydrate_batch_size: Max number of results whose elements are
+        hydrated together in a single request. Smaller batches are hydrated
+        when the results received so far run out, so that they aren't held
+        back while waiting for the server
+    :param hobgoblin.identity.IdentityMap identity_map: Mapping used to hold
+        the session's elements. Defaults to an unbounded
+        :py:class:`IdentityMap<hobgoblin.identity.IdentityMap>`
+    :param aiogremlin.driver.client.Client script_client: If set, elements
+        are saved and removed by submitting the canonical scripts of
+        :py:mod:`hobgoblin.scripts` with this client
+    :param aiogremlin.Graph graph: Graph to reuse, e.g. from a
+        :py:class:`PooledConnection<hobgoblin.pool.PooledConnection>`
+    :param internal_source: Traversal source bound to `remote_connection`
+        to reuse for internal traversals
+    :param release: Callable invoked when the session is closed, returning
+        the borrowed connection. Also invoked if the session is garbage
+        collected without being closed
     """
 
-    def __init__(self, app, remote_connection, get_hashable_id):
+    def __init__(self, app, remote_connection, get_hashable_id, *,
+                 hydrate_batch_size=64, identity_map=None,
+                 script_client=None, graph=None, internal_source=None,
+                 release=None):
         self._app = app
         self._remote_connection = remote_connection
         self._loop = self._app._loop
         self._use_session = False
         self._pending = collections.deque()
-        self._current = dict()
+        if identity_map is None:
+            identity_map = identity.IdentityMap()
+        self._current = identity_map
         self._get_hashable_id = get_hashable_id
-        self._graph = aiogremlin.Graph()
+        if graph is None:
+            graph = aiogremlin.Graph()
+        self._graph = graph
+        self._hydrate_batch_size = hydrate_batch_size
+        self._script_client = script_client
+        self._source = None
+        self._internal_source = internal_source
+        if release is not None:
+            # Runs at most once, on close or when the session is collected
+            release = weakref.finalize(self, release)
+        self._release = release
+        self._observers = app.observers
 
     @property
     def graph(self):
@@ -84,9 +360,20 @@ class Session:
 
     def close(self):
         """
+        Close the session, returning its connection to the app's pool if
+        it was borrowed.
         """
+        if self._release is not None:
+            self._release()
+            self._release = None
         self._remote_connection = None
+        # Script clients only hold the app's cluster, whose connections are
+        # released after each request. Client.close would close the cluster
+        # for every session, so the client is just dropped
+        self._script_client = None
         self._app = None
+        self._source = None
+        self._internal_source = None
 
     # Traversal API
     @property
@@ -104,11 +391,19 @@ class Session:
     def _g(self):
         """
         Traversal source for internal use. Uses undelying conn. Doesn't
-        trigger complex deserailization.
+        trigger complex deserailization. Built once per session.
         """
-        return self.graph.traversal().withRemote(self.remote_connection)
-
-    def traversal(self, element_class=None):
+        if self._internal_source is None:
+            self._internal_source = self.graph.traversal().withRemote(
+                self.remote_connection)
+        return self._internal_source
+
+    def traversal(self,
+                  element_class=None,
+                  *,
+                  prefetch=None,
+                  lazy=False,
+                  only=None):
         """
         Generate a traversal using a user defined element class as a
         starting point.
@@ -116,10 +411,44 @@ class Session:
         :param hobgoblin.element.Element element_class: An optional element
             class that will dictate the element type (vertex/edge) as well as
             the label for the traversal source
+        :param int prefetch: If set, results are streamed: they are read and
+            hydrated only as they are consumed, at most `prefetch` at a time.
+            By default all results are read eagerly in the background
+        :param bool lazy: If set, elements are hydrated with their id and
+            label only. Their properties are fetched by :py:meth:`load`
+        :param list only: Names of the properties of `element_class` to
+            fetch. Other properties are left unloaded: they can't be read,
+            and saving the element doesn't modify them. Use `lazy` to fetch
+            none of them
 
         :returns: `aiogremlin.process.graph_traversal.AsyncGraphTraversal`
         """
-        traversal = self.graph.traversal().withRemote(self)
+        options = {}
+        if prefetch is not None:
+            options['prefetch'] = prefetch
+        if lazy:
+            options['lazy'] = lazy
+        if only is not None:
+            if not element_class:
+                raise exception.ElementError(
+                    "Fetching only some properties requires an element class")
+            if not only:
+                raise ValueError(
+                    "No properties to fetch, use lazy=True instead")
+            props = element_class.__mapping__.ogm_properties
+            try:
+                options['only'] = tuple(props[name][0] for name in only)
+            except KeyError as e:
+                raise exception.MappingError(
+                    "unrecognized property {} for class: {}".format(
+                        e.args[0], element_class.__name__)) from e
+        if options:
+            traversal = self.graph.traversal().withRemote(
+                _TraversalRemote(self, **options))
+        else:
+            if self._source is None:
+                self._source = self.graph.traversal().withRemote(self)
+            traversal = self._source
         if element_class:
             label = element_class.__mapping__.label
             if element_class.__type__ == 'vertex':
@@ -129,94 +458,349 @@ class Session:
             traversal = traversal.hasLabel(label)
         return traversal
 
-    async def submit(self, bytecode):
+    def columns(self, element_class, traversal=None, *, only=None,
+                chunk_size=1000):
+        """
+        Stream the properties of `element_class` elements as columns instead
+        of hydrating OGM elements: an id array, a label array and an array
+        per mapped property, see :py:mod:`hobgoblin.columnar`. Results don't
+        go through the mapper and aren't added to the session.
+
+        :param hobgoblin.element.Element element_class: Class of the
+            elements yielded by the traversal
+        :param traversal: Traversal yielding the elements, by default all
+            elements of `element_class`
+        :param list only: Names of the properties to fetch, all by default
+        :param int chunk_size: Max number of rows per chunk
+
+        :returns: :py:class:`ColumnStream<hobgoblin.columnar.ColumnStream>`
+        """
+        if only is not None:
+            props = element_class.__mapping__.ogm_properties
+            for name in only:
+                if name not in props:
+                    raise exception.MappingError(
+                        "unrecognized property {} for class: {}".format(
+                            name, element_class.__name__))
+        if traversal is None:
+            traversal = self._g
+            if element_class.__type__ == 'vertex':
+                traversal = traversal.V()
+            else:
+                traversal = traversal.E()
+            traversal = traversal.hasLabel(element_class.__mapping__.label)
+        plan = columnar.ColumnPlan(element_class, only)
+        return columnar.ColumnStream(
+            self, plan.project(traversal.bytecode), plan, chunk_size)
+
+    async def submit(self, bytecode, *, prefetch=None, **options):
         """
         Submit a query to the Gremiln Server.
 
-        :param str gremlin: Gremlin script to submit to server.
-        :param dict bindings: A mapping of bindings for Gremlin script.
+        :param gremlin_python.process.traversal.Bytecode bytecode: Traversal
+            bytecode to submit to server.
+        :param int prefetch: Stream results, hydrating at most `prefetch` at a
+            time as they are consumed (see :py:class:`ResultStream`)
+        :param options: Hydration options, see :py:meth:`traversal`
 
         :returns:
             `gremlin_python.driver.remove_connection.RemoteTraversal`
             object
         """
         await self.flush()
-        remote_traversal = await self.remote_connection.submit(bytecode)
+        event = self._request(bytecode)
+        try:
+            remote_traversal = await self.remote_connection.submit(bytecode)
+        except Exception as e:
+            self._fail(event, e)
+            raise
         traversers = remote_traversal.traversers
         side_effects = remote_traversal.side_effects
+        if prefetch is not None:
+            stream = ResultStream(self, traversers, prefetch, options, event)
+            return RemoteTraversal(stream, side_effects)
         result_set = ResultSet(traversers.request_id, traversers._timeout,
                                self._loop)
-        self._loop.create_task(self._receive(traversers, result_set))
+        self._loop.create_task(
+            self._receive(traversers, result_set, options, event))
         return RemoteTraversal(result_set, side_effects)
 
-    async def _receive(self, traversers, result_set):
+    async def _receive(self, traversers, result_set, options, event=None):
         try:
+            batch = []
             async for result in traversers:
-                result = await self._deserialize_result(result)
-                msg = Message(200, result, '')
-                result_set.queue_result(msg)
+                if event is not None:
+                    event.count += 1
+                batch.append(result)
+                if (len(batch) >= self._hydrate_batch_size
+                        or _drained(traversers)):
+                    results = await self._deserialize_results(
+                        batch, **options)
+                    self._queue_results(results, result_set)
+                    batch = []
+            if batch:
+                results = await self._deserialize_results(batch, **options)
+                self._queue_results(results, result_set)
+            if event is not None:
+                self._respond(event)
         except Exception as e:
+            if event is not None:
+                self._fail(event, e)
             msg = Message(500, None, e.args[0])
             result_set.queue_result(msg)
         finally:
             result_set.queue_result(None)
 
-    async def _deserialize_result(self, result):
+    def _queue_results(self, results, result_set):
+        for result in results:
+            result_set.queue_result(Message(200, result, ''))
+
+    async def _deserialize_results(self, results, *, lazy=False,
+                                   only=None):
+        """
+        Hydrate all of the elements in a batch of results, including those
+        nested in lists, maps and paths. Each distinct element is fetched
+        once, with at most one request per element type, and shared by
+        reference between the results.
+
+        :param bool lazy: Only set ids and labels, see :py:meth:`load`
+        :param tuple only: Only fetch these db properties
+        """
+        vertices = {}
+        edges = {}
+        for result in results:
+            self._collect_elements(result, vertices, edges)
+        elements = {}
+        if lazy:
+            start = time.perf_counter()
+            loader = _Loader(only)
+            for objs in (vertices, edges):
+                for hashable_id, obj in objs.items():
+                    elements[hashable_id] = self._hydrate_lazy(obj, loader)
+        else:
+            vids = {hid: obj.id for hid, obj in vertices.items()}
+            eids = {hid: obj.id for hid, obj in edges.items()}
+            vertex_rows, edge_rows = await self._fetch_rows(vids, eids, only)
+            start = time.perf_counter()
+            for objs, rows in ((vertices, vertex_rows), (edges, edge_rows)):
+                for hashable_id, row in rows.items():
+                    elements[hashable_id] = self._hydrate(
+                        objs[hashable_id], row, only)
+        results = [
+            self._deserialize_result(result, elements) for result in results
+        ]
+        if self._observers:
+            self._emit('on_hydrate', hooks.HydrateEvent(
+                None, len(elements), time.perf_counter() - start))
+        return results
+
+    def _collect_elements(self, result, vertices, edges):
         if isinstance(result, Traverser):
-            bulk = result.bulk
-            obj = result.object
-            if isinstance(obj, (Vertex, Edge)):
-                hashable_id = self._get_hashable_id(obj.id)
-                current = self.current.get(hashable_id, None)
-                if isinstance(obj, Vertex):
-                    # why doesn't this come in on the vertex?
-                    label = await self._g.V(obj.id).label().next()
-                    if not current:
-                        current = self.app.vertices.get(label, GenericVertex)()
-                    props = await self._get_vertex_properties(obj.id, label)
-                if isinstance(obj, Edge):
-                    props = await self._g.E(obj.id).valueMap(True).next()
-                    if not current:
-                        current = self.app.edges.get(
-                            props.get('label'), GenericEdge)()
-                        current.source = GenericVertex()
-                        current.target = GenericVertex()
-                element = current.__mapping__.mapper_func(obj, props, current)
-                self.current[hashable_id] = element
-                return Traverser(element, bulk)
-            else:
-                return result
-        # Recursive serialization is broken in hobgoblin
+            self._collect_elements(result.object, vertices, edges)
+        elif isinstance(result, Vertex):
+            vertices[self._get_hashable_id(result.id)] = result
+        elif isinstance(result, Edge):
+            edges[self._get_hashable_id(result.id)] = result
         elif isinstance(result, dict):
-            for key in result:
-                result[key] = self._deserialize_result(result[key])
+            for key, value in result.items():
+                self._collect_elements(key, vertices, edges)
+                self._collect_elements(value, vertices, edges)
+        elif isinstance(result, (list, set)):
+            for item in result:
+                self._collect_elements(item, vertices, edges)
+        elif isinstance(result, Path):
+            for item in result.objects:
+                self._collect_elements(item, vertices, edges)
+
+    def _deserialize_result(self, result, elements):
+        """Replace db elements in result with their hydrated OGM elements"""
+        if isinstance(result, Traverser):
+            obj = self._deserialize_result(result.object, elements)
+            if obj is not result.object:
+                result = Traverser(obj, result.bulk)
             return result
+        elif isinstance(result, (Vertex, Edge)):
+            # Elements removed before they could be hydrated are left as is
+            return elements.get(self._get_hashable_id(result.id), result)
+        elif isinstance(result, dict):
+            return {
+                self._deserialize_result(key, elements):
+                self._deserialize_result(value, elements)
+                for key, value in result.items()
+            }
         elif isinstance(result, list):
-            return [self._deserialize_result(item) for item in result]
+            return [self._deserialize_result(item, elements)
+                    for item in result]
+        elif isinstance(result, set):
+            return {self._deserialize_result(item, elements)
+                    for item in result}
+        elif isinstance(result, Path):
+            return Path(result.labels, [
+                self._deserialize_result(item, elements)
+                for item in result.objects
+            ])
         else:
             return result
 
-    async def _get_vertex_properties(self, vid, label):
-        projection = self._g.V(vid).properties() \
-                            .project('id', 'key', 'value', 'meta') \
-                            .by(__.id()).by(__.key()).by(__.value()) \
-                            .by(__.valueMap())
-        props = await projection.toList()
-        new_props = {'label': label, 'id': vid}
-        for prop in props:
-            key = prop['key']
-            val = prop['value']
-            # print('val_type', type(val))
-            meta = prop['meta']
-            new_props.setdefault(key, [])
-            if meta:
-                meta['key'] = key
-                meta['value'] = val
-                meta['id'] = prop['id']
-                val = meta
-
-            new_props[key].append(val)
-        return new_props
+    def _hydrate(self, obj, row, only=None):
+        """Map a projected db row onto the session's element for obj"""
+        hashable_id = self._get_hashable_id(obj.id)
+        current = self.current.get(hashable_id, None)
+        if not current:
+            if isinstance(obj, Vertex):
+                current = self.app.vertices.get(row['label'], GenericVertex)()
+            else:
+                current = self.app.edges.get(row['label'], GenericEdge)()
+                current.source = GenericVertex()
+                current.target = GenericVertex()
+            current.__loaded__ = frozenset()
+        element = self._map_row(current, row, only)
+        self.current[hashable_id] = element
+        return element
+
+    def _map_row(self, element, row, only=None):
+        """
+        Map a projected db row onto element. If only some properties were
+        fetched, they are added to the element's loaded properties, unless
+        it is fully loaded already.
+        """
+        loaded = element.__loaded__
+        element.__loaded__ = None
+        if element.__type__ == 'vertex':
+            obj, props = _vertex_from_row(row)
+        else:
+            obj, props = _edge_from_row(row)
+        element = element.__mapping__.mapper_func(obj, props, element)
+        if only is not None and loaded is not None:
+            element.__loaded__ = loaded.union(
+                ogm_name for ogm_name, (db_name, _) in
+                element.__mapping__.ogm_properties.items()
+                if db_name in only)
+        elif element.__loader__ is not None:
+            element.__loader__.detach(element)
+        return element
+
+    def _hydrate_lazy(self, obj, loader):
+        """Get the session's element for obj, as a proxy if not loaded yet"""
+        hashable_id = self._get_hashable_id(obj.id)
+        current = self.current.get(hashable_id, None)
+        if current:
+            return current
+        if isinstance(obj, Vertex):
+            current = self.app.vertices.get(obj.label, GenericVertex)()
+        else:
+            current = self.app.edges.get(obj.label, GenericEdge)()
+            current.source = GenericVertex()
+            current.source.id = obj.outV.id
+            current.target = GenericVertex()
+            current.target.id = obj.inV.id
+        if obj.label != current.__label__:
+            current.__label__ = obj.label
+        current.id = obj.id
+        current.__loaded__ = frozenset()
+        current.__loader__ = loader
+        current.__dirty__ = mapper.CLEAN
+        loader.elements.add(current)
+        self.current[hashable_id] = current
+        return current
+
+    async def load(self, *elements, siblings=True):
+        """
+        Fetch the properties of elements hydrated by a lazy traversal, or the
+        remaining properties of partially loaded elements. Elements that are
+        fully loaded are ignored.
+
+        :param hobgoblin.element.Element elements: Elements to load
+        :param bool siblings: Also load the other unloaded elements that
+            came from the same lazy traversal results, in the same request
+        """
+        # Lazy proxies only fetch the properties their traversal asked for
+        groups = collections.OrderedDict()
+        for elem in elements:
+            loader = elem.__loader__
+            group = list(loader.elements) if loader and siblings else [elem]
+            for proxy in group:
+                if proxy.__loaded__ is None:
+                    continue
+                only = proxy.__loader__.only if proxy.__loader__ else None
+                proxies = groups.setdefault(only, collections.OrderedDict())
+                proxies[self._get_hashable_id(proxy.id)] = proxy
+        for only, proxies in groups.items():
+            vids = {}
+            eids = {}
+            for hashable_id, proxy in proxies.items():
+                if proxy.__type__ == 'vertex':
+                    vids[hashable_id] = proxy.id
+                else:
+                    eids[hashable_id] = proxy.id
+            vertex_rows, edge_rows = await self._fetch_rows(vids, eids, only)
+            for rows in (vertex_rows, edge_rows):
+                for hashable_id, row in rows.items():
+                    proxy = proxies[hashable_id]
+                    if proxy.__loader__ is not None:
+                        proxy.__loader__.detach(proxy)
+                    self._map_row(proxy, row, only)
+
+    async def _fetch_rows(self, vids, eids, only=None):
+        """
+        Fetch hydration rows for many vertices and edges, using at most one
+        request per element type. Rows found in the app's element cache are
+        not requested. Partial rows aren't cached.
+
+        :param dict vids: Maps hashable id -> vertex id
+        :param dict eids: Maps hashable id -> edge id
+        :param tuple only: Only fetch these db properties
+
+        :returns: tuple of dicts mapping hashable id -> row
+        """
+        if only is not None:
+            keys = only
+            vertex_rows = {}
+            edge_rows = {}
+        else:
+            keys = ()
+            vertex_rows = self._cached_rows('vertex', vids)
+            edge_rows = self._cached_rows('edge', eids)
+        vids = [vid for hid, vid in vids.items() if hid not in vertex_rows]
+        eids = [eid for hid, eid in eids.items() if hid not in edge_rows]
+        if vids:
+            rows = await self._run(_project_vertex(self._g.V(*vids), keys))
+            self._store_rows('vertex', rows, vertex_rows,
+                             cache=only is None)
+        if eids:
+            rows = await self._run(_project_edge(self._g.E(*eids), keys))
+            self._store_rows('edge', rows, edge_rows, cache=only is None)
+        return vertex_rows, edge_rows
+
+    # Vertex and edge ids may overlap, so cache keys include the type
+    def _cached_rows(self, element_type, ids):
+        cache = self._app.cache
+        rows = {}
+        if cache is not None:
+            for hashable_id in ids:
+                row = cache.get((element_type, hashable_id))
+                if row is not None:
+                    rows[hashable_id] = row
+        return rows
+
+    def _store_rows(self, element_type, rows, result, *, cache=True):
+        cache = self._app.cache if cache else None
+        for row in rows:
+            hashable_id = self._get_hashable_id(row['id'])
+            result[hashable_id] = row
+            if cache is not None:
+                refs = ()
+                if element_type == 'edge':
+                    # Dropped along with their endpoints
+                    refs = [('vertex', self._get_hashable_id(row[key]))
+                            for key in ('outV', 'inV')]
+                cache.set((element_type, hashable_id), row, refs)
+
+    def _invalidate(self, elem):
+        cache = self._app.cache
+        if cache is not None and hasattr(elem, 'id'):
+            cache.invalidate(
+                (elem.__type__, self._get_hashable_id(elem.id)))
 
     # Creation API
     def add(self, *elements):
@@ -228,23 +812,149 @@ class Session:
         for elem in elements:
             self._pending.append(elem)
 
-    async def flush(self):
+    async def flush(self, *, batch_size=None, concurrency=None):
         """
         Issue creation/update queries to database for all elements in the
         session pending queue.
+
+        :param int batch_size: If set, new elements are grouped by label and
+            created with one request per chunk of at most `batch_size`
+            elements. Batched elements are assigned their ids, but are not
+            read back from the db.
+        :param int concurrency: If set, up to `concurrency` saves (or
+            batches) are in flight at once.
+
+        When either option is used, pending vertices are saved before
+        pending edges, and failures don't stop the flush: a
+        :py:class:`FlushError<hobgoblin.exception.FlushError>` listing every
+        element that couldn't be saved is raised at the end.
         """
+        if batch_size or concurrency:
+            await self._flush_phased(batch_size, concurrency or 1)
         while self._pending:
             elem = self._pending.popleft()
             await self.save(elem)
 
+    async def _flush_phased(self, batch_size, concurrency):
+        vertices = []
+        edges = []
+        while self._pending:
+            elem = self._pending.popleft()
+            if elem.__type__ == 'vertex':
+                vertices.append(elem)
+            elif elem.__type__ == 'edge':
+                edges.append(elem)
+            else:
+                raise exception.ElementError(
+                    "Unknown element type: {}".format(elem.__type__))
+        # Vertices go first so that edges can reference their ids
+        jobs = self._flush_jobs(vertices, batch_size, self.save_vertex,
+                                self._add_vertex_branch)
+        errors = await self._run_flush_jobs(jobs, concurrency)
+        failed = {id(elem) for elem, _ in errors}
+        if failed:
+            ok_edges = []
+            for edge in edges:
+                if (id(getattr(edge, 'source', None)) in failed
+                        or id(getattr(edge, 'target', None)) in failed):
+                    errors.append((edge, exception.ElementError(
+                        "Edge source/target vertex could not be saved")))
+                else:
+                    ok_edges.append(edge)
+            edges = ok_edges
+        jobs = self._flush_jobs(edges, batch_size, self.save_edge,
+                                self._add_edge_branch)
+        errors.extend(await self._run_flush_jobs(jobs, concurrency))
+        if errors:
+            raise exception.FlushError(errors)
+
+    def _flush_jobs(self, elements, batch_size, save_func, branch_func):
+        """
+        Split elements into ``(elements, coroutine function)`` jobs. New
+        elements are grouped into batches by label if `batch_size` is set.
+        """
+        jobs = []
+        new_elements = collections.OrderedDict()
+        for elem in elements:
+            if batch_size and not hasattr(elem, 'id'):
+                new_elements.setdefault(elem.__mapping__.label,
+                                        []).append(elem)
+            else:
+                jobs.append(([elem], functools.partial(save_func, elem)))
+        for label, elems in new_elements.items():
+            for chunk in _chunks(elems, batch_size):
+                jobs.append((chunk, functools.partial(
+                    self._add_elements, chunk, branch_func)))
+        return jobs
+
+    async def _run_flush_jobs(self, jobs, concurrency):
+        """
+        Run jobs with at most `concurrency` in flight.
+
+        :returns: list of (element, exception) for every failed element
+        """
+        jobs = collections.deque(jobs)
+        errors = []
+
+        async def worker():
+            while jobs:
+                elements, func = jobs.popleft()
+                try:
+                    await func()
+                except Exception as e:
+                    errors.extend((elem, e) for elem in elements)
+
+        workers = [worker() for _ in range(min(concurrency, len(jobs)))]
+        await asyncio.gather(*workers)
+        return errors
+
+    async def _add_elements(self, elements, branch_func):
+        """
+        Create several elements with a single traversal, one union branch
+        per element.
+        """
+        branches = [
+            branch_func(elem, 'e{}_'.format(i)).project('i', 'id').by(
+                __.constant(i)).by(__.id())
+            for i, elem in enumerate(elements)
+        ]
+        rows = await self._run(self._g.inject(1).union(*branches),
+                               element_class=type(elements[0]))
+        for row in rows:
+            elem = elements[row['i']]
+            elem.id = row['id']
+            mapper.mark_clean(elem)
+            self.current[self._get_hashable_id(elem.id)] = elem
+
+    def _add_vertex_branch(self, vertex, prefix):
+        props = mapper.map_props_to_db(vertex, vertex.__mapping__)
+        traversal = __.addV(vertex.__mapping__.label)
+        return _add_property_steps(traversal, props, prefix=prefix)
+
+    def _add_edge_branch(self, edge, prefix):
+        source = getattr(edge, 'source', None)
+        target = getattr(edge, 'target', None)
+        if not (hasattr(source, 'id') and hasattr(target, 'id')):
+            raise exception.ElementError(
+                "Edges require both source/target vertices")
+        props = mapper.map_props_to_db(edge, edge.__mapping__)
+        traversal = __.V(Binding(prefix + 'sid', source.id))
+        traversal = traversal.addE(edge.__mapping__.label)
+        traversal = traversal.to(__.V(Binding(prefix + 'tid', target.id)))
+        return _add_property_steps(traversal, props, prefix=prefix)
+
     async def remove_vertex(self, vertex):
         """
         Remove a vertex from the db.
 
         :param hobgoblin.element.Vertex vertex: Vertex to be removed
         """
-        traversal = self._g.V(Binding('vid', vertex.id)).drop()
-        result = await self._simple_traversal(traversal, vertex)
+        self._invalidate(vertex)
+        if self._script_client is not None:
+            result = await self._eval(vertex, 'delete', {'eid': vertex.id})
+        else:
+            traversal = self._g.V(Binding('vid', vertex.id)).drop()
+            result = await self._simple_traversal(traversal, vertex)
         hashable_id = self._get_hashable_id(vertex.id)
         if hashable_id in self.current:
             vertex = self.current.pop(hashable_id)
@@ -261,11 +971,15 @@ class Session:
 
         :param hobgoblin.element.Edge edge: Element to be removed
         """
-        eid = edge.id
-        if isinstance(eid, dict):
-            eid = Binding('eid', edge.id)
-        traversal = self._g.E(eid).drop()
-        result = await self._simple_traversal(traversal, edge)
+        self._invalidate(edge)
+        if self._script_client is not None:
+            result = await self._eval(edge, 'delete', {'eid': edge.id})
+        else:
+            eid = edge.id
+            if isinstance(eid, dict):
+                eid = Binding('eid', edge.id)
+            traversal = self._g.E(eid).drop()
+            result = await self._simple_traversal(traversal, edge)
         hashable_id = self._get_hashable_id(edge.id)
         if hashable_id in self.current:
             edge = self.current.pop(hashable_id)
@@ -301,8 +1015,10 @@ class Session:
 
         :returns: :py:class:`Vertex<hobgoblin.element.Vertex>` object
         """
-        result = await self._save_element(
-            vertex, self._check_vertex, self._add_vertex, self._update_vertex)
+        self._invalidate(vertex)
+        result = await self._save_element(vertex, self._add_vertex,
+                                          self._upsert_vertex)
+        self._invalidate(result)
         hashable_id = self._get_hashable_id(result.id)
         self.current[hashable_id] = result
         return result
@@ -318,8 +1034,10 @@ class Session:
         if not (hasattr(edge, 'source') and hasattr(edge, 'target')):
             raise exception.ElementError(
                 "Edges require both source/target vertices")
-        result = await self._save_element(edge, self._check_edge,
-                                          self._add_edge, self._update_edge)
+        self._invalidate(edge)
+        result = await self._save_element(edge, self._add_edge,
+                                          self._upsert_edge)
+        self._invalidate(result)
         hashable_id = self._get_hashable_id(result.id)
         self.current[hashable_id] = result
         return result
@@ -347,120 +1065,268 @@ class Session:
             eid = Binding('eid', edge.id)
         return await self.g.E(eid).next()
 
-    async def _update_vertex(self, vertex):
+    async def _simple_traversal(self, traversal, element):
+        if element.__type__ == 'vertex':
+            traversal = _project_vertex(traversal)
+        elif element.__type__ == 'edge':
+            traversal = _project_edge(traversal)
+        return await self._read_back(traversal, element)
+
+    async def _read_back(self, traversal, element):
+        """Map the row emitted by a projected traversal onto `element`"""
+        row = await self._run(traversal, 'next', type(element))
+        return self._map_projected(row, element)
+
+    def _map_projected(self, row, element):
+        if row:
+            start = time.perf_counter()
+            if element.__type__ == 'vertex':
+                elem, props = _vertex_from_row(row)
+            else:
+                elem, props = _edge_from_row(row)
+            result = element.__mapping__.mapper_func(elem, props, element)
+            if self._observers:
+                self._emit('on_hydrate', hooks.HydrateEvent(
+                    type(element), 1, time.perf_counter() - start))
+            return result
+
+    def _bound_traversal(self, template, bindings):
+        """Internal traversal running `template` with new binding values"""
+        g = self._g
+        return AsyncGraphTraversal(g.graph, g.traversal_strategies,
+                                   template.bind(bindings))
+
+    async def _upsert_vertex(self, vertex):
         """
-        Update a vertex, generally to change/remove property values.
+        Update a vertex, or create it if it no longer exists, with a single
+        conditional traversal.
 
-        :param hobgoblin.element.Vertex vertex: Vertex to be updated
+        :param hobgoblin.element.Vertex vertex: Vertex to be upserted
 
         :returns: :py:class:`Vertex<hobgoblin.element.Vertex>` object
         """
-        props = mapper.map_props_to_db(vertex, vertex.__mapping__)
-        traversal = self._g.V(Binding('vid', vertex.id))
-        return await self._update_vertex_properties(vertex, traversal, props)
+        label = vertex.__mapping__.label
 
-    async def _update_edge(self, edge):
+        def find():
+            return self._g.V(Binding('vid', vertex.id)).fold()
+
+        def create():
+            return __.addV(label)
+
+        return await self._upsert(vertex, find, create, {'vid': vertex.id})
+
+    async def _upsert_edge(self, edge):
         """
-        Update an edge, generally to change/remove property values.
+        Update an edge, or create it if it no longer exists, with a single
+        conditional traversal.
 
-        :param hobgoblin.element.Edge edge: Edge to be updated
+        :param hobgoblin.element.Edge edge: Edge to be upserted
 
         :returns: :py:class:`Edge<hobgoblin.element.Edge>` object
         """
-        props = mapper.map_props_to_db(edge, edge.__mapping__)
-        eid = edge.id
-        if isinstance(eid, dict):
-            eid = Binding('eid', edge.id)
-        traversal = self._g.E(eid)
-        return await self._update_edge_properties(edge, traversal, props)
+        label = edge.__mapping__.label
+        bindings = {
+            'eid': edge.id,
+            'sid': edge.source.id,
+            'tid': edge.target.id
+        }
 
-    # *metodos especiales privados for creation API
+        def find():
+            return self._g.E(Binding('eid', edge.id)).fold()
 
-    async def _simple_traversal(self, traversal, element):
-        elem = await traversal.next()
-        if elem:
-            if element.__type__ == 'vertex':
-                # Look into this
-                label = await self._g.V(elem.id).label().next()
-                props = await self._get_vertex_properties(elem.id, label)
-            elif element.__type__ == 'edge':
-                props = await self._g.E(elem.id).valueMap(True).next()
-            elem = element.__mapping__.mapper_func(elem, props, element)
-        return elem
+        def create():
+            traversal = __.V(Binding('sid', edge.source.id)).addE(label)
+            return traversal.to(__.V(Binding('tid', edge.target.id)))
+
+        return await self._upsert(edge, find, create, bindings)
+
+    # *metodos especiales privados for creation API
 
-    async def _save_element(self, elem, check_func, create_func, update_func):
+    async def _save_element(self, elem, create_func, upsert_func):
+        if self._script_client is not None:
+            create_func, upsert_func = self._eval_add, self._eval_upsert
         if hasattr(elem, 'id'):
-            exists = await check_func(elem)
-            if not exists:
-                result = await create_func(elem)
-            else:
-                result = await update_func(elem)
+            result = await upsert_func(elem)
         else:
             result = await create_func(elem)
         return result
 
     async def _add_vertex(self, vertex):
         """Convenience function for generating crud traversals."""
-        props = mapper.map_props_to_db(vertex, vertex.__mapping__)
-        traversal = self._g.addV(vertex.__mapping__.label)
-        return await self._add_properties(traversal, props, vertex)
+        mapping = vertex.__mapping__
+        props = mapper.map_props_to_db(vertex, mapping)
+
+        def build():
+            traversal = self._g.addV(mapping.label)
+            return _project_vertex(_add_property_steps(traversal, props))
+
+        key = (mapping, 'add', _props_shape(props))
+        template = self._app.templates.get(key, build)
+        traversal = self._bound_traversal(template, _property_bindings(props))
+        return await self._read_back(traversal, vertex)
 
     async def _add_edge(self, edge):
         """Convenience function for generating crud traversals."""
-        props = mapper.map_props_to_db(edge, edge.__mapping__)
-        traversal = self._g.V(Binding('sid', edge.source.id))
-        traversal = traversal.addE(edge.__mapping__._label)
-        traversal = traversal.to(__.V(Binding('tid', edge.target.id)))
-        return await self._add_properties(traversal, props, edge)
-
-    async def _check_vertex(self, vertex):
-        """Used to check for existence, does not update session vertex"""
-        msg = await self._g.V(Binding('vid', vertex.id)).next()
-        return msg
-
-    async def _check_edge(self, edge):
-        """Used to check for existence, does not update session edge"""
-        eid = edge.id
-        if isinstance(eid, dict):
-            eid = Binding('eid', edge.id)
-        return await self._g.E(eid).next()
-
-    async def _update_vertex_properties(self, vertex, traversal, props):
-        await self._g.V(vertex.id).properties().drop().iterate()
-        return await self._add_properties(traversal, props, vertex)
-
-    async def _update_edge_properties(self, edge, traversal, props):
-        await self._g.E(edge.id).properties().drop().iterate()
-        return await self._add_properties(traversal, props, edge)
-
-    async def _add_properties(self, traversal, props, elem):
-        binding = 0
-        for card, db_name, val, metaprops in props:
-            if not metaprops:
-                metaprops = {}
-            if val is not None:
-                key = ('k' + str(binding), db_name)
-                val = ('v' + str(binding), val)
-                if card:
-                    # Maybe use a dict here as a translator
-                    if card == Cardinality.list_:
-                        card = Cardinality.list_
-                    elif card == Cardinality.set_:
-                        card = Cardinality.set_
-                    else:
-                        card = Cardinality.single
-                    metas = [
-                        j
-                        for i in zip(metaprops.keys(), metaprops.values())
-                        for j in i
-                    ]
-                    traversal = traversal.property(card, key, val, *metas)
-                else:
-                    metas = [
-                        j
-                        for i in zip(metaprops.keys(), metaprops.values())
-                        for j in i
-                    ]
-                    traversal = traversal.property(key, val, *metas)
-                binding += 1
-        return await self._simple_traversal(traversal, elem)
+        mapping = edge.__mapping__
+        props = mapper.map_props_to_db(edge, mapping)
+
+        def build():
+            traversal = self._g.V(Binding('sid', edge.source.id))
+            traversal = traversal.addE(mapping.label)
+            traversal = traversal.to(__.V(Binding('tid', edge.target.id)))
+            return _project_edge(_add_property_steps(traversal, props))
+
+        key = (mapping, 'add', _props_shape(props))
+        template = self._app.templates.get(key, build)
+        bindings = _property_bindings(props)
+        bindings['sid'] = edge.source.id
+        bindings['tid'] = edge.target.id
+        traversal = self._bound_traversal(template, bindings)
+        return await self._read_back(traversal, edge)
+
+    async def _upsert(self, elem, find, create, bindings):
+        """
+        Find-or-create: ``find()`` must return a traversal emitting the
+        folded existing element, ``create()`` one adding a new element.
+        Existing elements get their changed properties replaced (all of them
+        if the element isn't tracked), otherwise a new one is created with
+        all properties. Tracked elements without changes are skipped.
+
+        :param dict bindings: Values bound by `find` and `create`
+        """
+        mapping = elem.__mapping__
+        props = mapper.map_props_to_db(elem, mapping)
+        bindings.update(_property_bindings(props))
+        if elem.__dirty__ is None:
+
+            def build():
+                update = __.unfold().sideEffect(__.properties().drop())
+                update = _add_property_steps(update, props)
+                created = _add_property_steps(create(), props)
+                traversal = find().coalesce(update, created)
+                if elem.__type__ == 'vertex':
+                    return _project_vertex(traversal)
+                return _project_edge(traversal)
+
+            template = self._app.templates.get(
+                (mapping, 'replace', _props_shape(props)), build)
+            traversal = self._bound_traversal(template, bindings)
+            return await self._read_back(traversal, elem)
+        changed = mapper.map_props_to_db(elem, mapping, changed_only=True)
+        if not changed:
+            return elem
+        bindings.update(_property_bindings(changed, prefix='u'))
+
+        def build():
+            update = _replace_property_steps(__.unfold(), changed, prefix='u')
+            created = _add_property_steps(create(), props)
+            return find().coalesce(update, created).id()
+
+        template = self._app.templates.get(
+            (mapping, 'upsert', _props_shape(changed), _props_shape(props)),
+            build)
+        traversal = self._bound_traversal(template, bindings)
+        elem.id = await self._run(traversal, 'next', type(elem))
+        mapper.mark_clean(elem)
+        return elem
+
+    # Script (op='eval') mode, see hobgoblin.scripts
+
+    async def _eval(self, element, op, bindings):
+        """Submit the canonical script for `op` on `element`"""
+        script = scripts.script(element, op)
+        event = self._request(script=script, bindings=bindings,
+                              element_class=type(element))
+        try:
+            result_set = await self._script_client.submit(
+                script, bindings=bindings)
+            result = await result_set.one()
+        except Exception as e:
+            self._fail(event, e)
+            raise
+        if event is not None:
+            event.count = int(result is not None)
+            self._respond(event)
+        return result
+
+    def _eval_bindings(self, elem, props):
+        bindings = {
+            'label': elem.__mapping__.label,
+            'props': scripts.property_bindings(props)
+        }
+        if elem.__type__ == 'edge':
+            bindings['sid'] = elem.source.id
+            bindings['tid'] = elem.target.id
+        return bindings
+
+    async def _eval_add(self, elem):
+        props = mapper.map_props_to_db(elem, elem.__mapping__)
+        row = await self._eval(elem, 'create',
+                               self._eval_bindings(elem, props))
+        return self._map_projected(row, elem)
+
+    async def _eval_upsert(self, elem):
+        """Script counterpart of :py:meth:`_upsert`"""
+        props = mapper.map_props_to_db(elem, elem.__mapping__)
+        bindings = self._eval_bindings(elem, props)
+        bindings['eid'] = elem.id
+        if elem.__dirty__ is None:
+            bindings.update(drop=None, update=bindings['props'], project=True)
+            row = await self._eval(elem, 'upsert', bindings)
+            return self._map_projected(row, elem)
+        changed = mapper.map_props_to_db(
+            elem, elem.__mapping__, changed_only=True)
+        if not changed:
+            return elem
+        bindings.update(
+            drop=list(collections.OrderedDict.fromkeys(p[1] for p in changed)),
+            update=scripts.property_bindings(changed),
+            project=False)
+        elem.id = await self._eval(elem, 'upsert', bindings)
+        mapper.mark_clean(elem)
+        return elem
+
+    # Observer hooks, see hobgoblin.hooks
+
+    async def _run(self, traversal, terminal='toList', element_class=None):
+        """
+        Run an internal traversal with `terminal` ('toList' or 'next'),
+        notifying observers.
+        """
+        event = self._request(traversal.bytecode, element_class=element_class)
+        try:
+            result = await getattr(traversal, terminal)()
+        except Exception as e:
+            self._fail(event, e)
+            raise
+        if event is not None:
+            if terminal == 'next':
+                event.count = int(result is not None)
+            else:
+                event.count = len(result)
+            self._respond(event)
+        return result
+
+    def _request(self, bytecode=None, **kwargs):
+        """Start a request event, ``None`` if there are no observers"""
+        if not self._observers:
+            return None
+        event = hooks.RequestEvent(bytecode, **kwargs)
+        self._emit('on_request', event)
+        return event
+
+    def _respond(self, event):
+        event.finish()
+        self._emit('on_response', event)
+
+    def _fail(self, event, error):
+        if event is not None:
+            event.finish(error=error)
+            self._emit('on_error', event)
+
+    def _emit(self, hook, event):
+        for observer in self._observers:
+            try:
+                getattr(observer, hook)(event)
+            except Exception:
+                logger.exception("Observer %r failed in %s", observer, hook)
@@ -0,0 +1,113 @@
+"""Precompiled traversal templates for the OGM's CRUD traversals"""
+
+import collections
+
+from gremlin_python.process.traversal import Binding, Bytecode
+
+
+class TraversalTemplate:
+    """
+    Traversal bytecode that is built once and re-bound with new
+    :py:class:`Binding<gremlin_python.process.traversal.Binding>` values for
+    every element it is used with.
+
+    :param gremlin_python.process.traversal.Bytecode bytecode: Bytecode in
+        which all per element values are bindings
+    """
+
+    def __init__(self, bytecode):
+        self._bytecode = bytecode
+
+    @property
+    def bytecode(self):
+        return self._bytecode
+
+    def bind(self, bindings):
+        """
+        Copy the template's bytecode, replacing bound values.
+
+        :param dict bindings: Maps binding names to new values. Bindings that
+            aren't in the dict keep their template value
+
+        :returns: :py:class:`~gremlin_python.process.traversal.Bytecode`
+        """
+        return _rebind(self._bytecode, bindings)
+
+
+class TemplateCache:
+    """
+    Caches traversal templates. Keys should identify the element class, the
+    operation and the property shape, i.e. everything that changes the
+    bytecode other than bound values. Shapes vary with the number of values
+    of multi-valued properties, so the least recently used template is
+    evicted when the cache is full.
+
+    :param int maxsize: Maximum number of cached templates
+    """
+
+    def __init__(self, maxsize=1024):
+        self._maxsize = maxsize
+        self._templates = collections.OrderedDict()
+        self._evictions = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def evictions(self):
+        return self._evictions
+
+    def get(self, key, build):
+        """
+        Get the template for `key`, building it from the traversal returned
+        by `build` if it isn't cached.
+
+        :returns: :py:class:`TraversalTemplate`
+        """
+        template = self._templates.get(key)
+        if template is None:
+            template = TraversalTemplate(build().bytecode)
+            self._templates[key] = template
+            while len(self._templates) > self._maxsize:
+                self._templates.popitem(last=False)
+                self._evictions += 1
+        else:
+            self._templates.move_to_end(key)
+        return template
+
+    def clear(self):
+        self._templates.clear()
+
+    def __len__(self):
+        return len(self._templates)
+
+
+def _rebind(bytecode, bindings):
+    result = Bytecode()
+    result.source_instructions = [
+        _rebind_instruction(instruction, bindings, result.bindings)
+        for instruction in bytecode.source_instructions
+    ]
+    result.step_instructions = [
+        _rebind_instruction(instruction, bindings, result.bindings)
+        for instruction in bytecode.step_instructions
+    ]
+    return result
+
+
+def _rebind_instruction(instruction, bindings, bound):
+    args = [_rebind_arg(arg, bindings, bound) for arg in instruction[1:]]
+    return [instruction[0]] + args
+
+
+def _rebind_arg(arg, bindings, bound):
+    if isinstance(arg, Binding):
+        value = bindings.get(arg.key, arg.value)
+        bound[arg.key] = value
+        return Binding(arg.key, value)
+    elif isinstance(arg, Bytecode):
+        child = _rebind(arg, bindings)
+        bound.update(child.bindings)
+        return child
+    return arg
@@ -0,0 +1,554 @@
+"""
+In-process stand-in for a Gremlin Server, to test and benchmark the OGM
+without a database. :py:class:`FakeRemoteConnection` interprets the subset
+of traversal bytecode the OGM emits against an :py:class:`InMemoryGraph`::
+
+    session = Session(app, FakeRemoteConnection(latency=0.001),
+                      app._get_hashable_id)
+
+Only bytecode is supported: ``op='eval'`` sessions need a real server.
+"""
+
+import asyncio
+import itertools
+import uuid
+
+from gremlin_python.driver.remote_connection import RemoteTraversal
+from gremlin_python.process.traversal import (
+    Binding, Bytecode, Cardinality, P, Traverser)
+from gremlin_python.structure import graph
+
+
+class _Vertex:
+    def __init__(self, id, label):
+        self.id = id
+        self.label = label
+        self.properties = {}
+
+
+class _Edge:
+    def __init__(self, id, label, out_v, in_v):
+        self.id = id
+        self.label = label
+        self.out_v = out_v
+        self.in_v = in_v
+        self.properties = {}
+
+
+class _VertexProperty:
+    def __init__(self, id, key, value, meta, vertex):
+        self.id = id
+        self.key = key
+        self.label = key
+        self.value = value
+        self.meta = meta
+        self.vertex = vertex
+
+
+class _Property:
+    def __init__(self, key, value, element):
+        self.key = key
+        self.value = value
+        self.element = element
+
+
+class _PendingEdge:
+    """An edge added by addE that still needs its to/from vertex"""
+
+    def __init__(self, label, vertex):
+        self.label = label
+        self.vertex = vertex
+
+
+class InMemoryGraph:
+    """
+    Graph held in memory. Elements get ids from a single integer counter,
+    like TinkerGraph's default id manager.
+    """
+
+    def __init__(self):
+        self.vertices = {}
+        self.edges = {}
+        self._ids = itertools.count(1)
+
+    def next_id(self):
+        return next(self._ids)
+
+    def add_vertex(self, label):
+        vertex = _Vertex(self.next_id(), label)
+        self.vertices[vertex.id] = vertex
+        return vertex
+
+    def add_edge(self, label, out_v, in_v):
+        edge = _Edge(self.next_id(), label, out_v, in_v)
+        self.edges[edge.id] = edge
+        return edge
+
+    def remove(self, obj):
+        if isinstance(obj, _Vertex):
+            self.vertices.pop(obj.id, None)
+            for edge in list(self.edges.values()):
+                if obj in (edge.out_v, edge.in_v):
+                    del self.edges[edge.id]
+        elif isinstance(obj, _Edge):
+            self.edges.pop(obj.id, None)
+        elif isinstance(obj, _VertexProperty):
+            props = obj.vertex.properties.get(obj.key, [])
+            if obj in props:
+                props.remove(obj)
+            if not props:
+                obj.vertex.properties.pop(obj.key, None)
+        elif isinstance(obj, _Property):
+            owner = obj.element
+            if isinstance(owner, _VertexProperty):
+                owner.meta.pop(obj.key, None)
+            else:
+                owner.properties.pop(obj.key, None)
+
+    def set_property(self, elem, card, key, value, meta):
+        if isinstance(elem, _Edge):
+            elem.properties[key] = value
+            return
+        props = elem.properties.setdefault(key, [])
+        if card in (None, Cardinality.single):
+            props.clear()
+        elif card == Cardinality.set_:
+            if any(prop.value == value for prop in props):
+                return
+        props.append(
+            _VertexProperty(self.next_id(), key, value, meta, elem))
+
+    def __len__(self):
+        return len(self.vertices) + len(self.edges)
+
+
+class _Results:
+    """Async iterator over traversers, with the driver's result attributes"""
+
+    def __init__(self, results):
+        self.request_id = str(uuid.uuid4())
+        self._timeout = None
+        self._results = iter(results)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeRemoteConnection:
+    """
+    Remote connection that runs traversals against an in-memory graph.
+    Each request is delayed by `latency` seconds, so network cost can be
+    simulated reproducibly.
+
+    :param InMemoryGraph graph: Graph to query, a new empty one by default
+    :param float latency: Seconds slept per request
+    """
+
+    def __init__(self, graph=None, *, latency=0):
+        if graph is None:
+            graph = InMemoryGraph()
+        self._graph = graph
+        self._latency = latency
+        self._requests = 0
+
+    @property
+    def graph(self):
+        return self._graph
+
+    @property
+    def latency(self):
+        return self._latency
+
+    @property
+    def requests(self):
+        """Number of submitted requests"""
+        return self._requests
+
+    async def submit(self, bytecode):
+        self._requests += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        results = _Interpreter(self._graph).run(bytecode, None)
+        traversers = [Traverser(_to_result(result)) for result in results]
+        return RemoteTraversal(_Results(traversers), None)
+
+    async def close(self):
+        pass
+
+
+class _Step:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.modulators = []
+
+
+def _parse(bytecode):
+    steps = []
+    for instruction in bytecode.step_instructions:
+        name = instruction[0]
+        args = [
+            arg.value if isinstance(arg, Binding) else arg
+            for arg in instruction[1:]
+        ]
+        if name in ('by', 'to', 'from') and steps:
+            steps[-1].modulators.append((name, args))
+        else:
+            steps.append(_Step(name, args))
+    return steps
+
+
+def _ids(args):
+    ids = []
+    for arg in args:
+        if isinstance(arg, (list, tuple, set)):
+            ids.extend(arg)
+        else:
+            ids.append(arg)
+    return ids
+
+
+def _test(predicate, value):
+    if not isinstance(predicate, P):
+        return value == predicate
+    op = predicate.operator
+    other = predicate.value
+    if op == 'eq':
+        return value == other
+    elif op == 'neq':
+        return value != other
+    elif op == 'lt':
+        return value < other
+    elif op == 'lte':
+        return value <= other
+    elif op == 'gt':
+        return value > other
+    elif op == 'gte':
+        return value >= other
+    elif op == 'within':
+        return value in _ids([other])
+    elif op == 'without':
+        return value not in _ids([other])
+    raise NotImplementedError("Unsupported predicate: {}".format(op))
+
+
+def _values(obj, key):
+    if isinstance(obj, _Vertex):
+        return [prop.value for prop in obj.properties.get(key, [])]
+    elif isinstance(obj, _Edge):
+        return [obj.properties[key]] if key in obj.properties else []
+    elif isinstance(obj, _VertexProperty):
+        return [obj.meta[key]] if key in obj.meta else []
+    return []
+
+
+class _Interpreter:
+    """
+    Runs bytecode over a list of traverser objects. ``None`` stands for the
+    start of a traversal, before any traverser exists.
+    """
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def run(self, bytecode, objs):
+        for step in _parse(bytecode):
+            func = getattr(self, '_' + step.name.rstrip('_'), None)
+            if func is None:
+                raise NotImplementedError(
+                    "Unsupported step: {}".format(step.name))
+            objs = func(objs, step)
+        return objs if objs is not None else []
+
+    def _child(self, traversal, obj):
+        if isinstance(traversal, Bytecode):
+            return self.run(traversal, [obj])
+        elif traversal is None:
+            return [obj]
+        # by(key)
+        return _values(obj, traversal)
+
+    def _each(self, objs):
+        return [None] if objs is None else objs
+
+    # Start steps
+
+    def _V(self, objs, step):
+        ids = _ids(step.args)
+        if ids:
+            found = [self._graph.vertices[i] for i in ids
+                     if i in self._graph.vertices]
+        else:
+            found = list(self._graph.vertices.values())
+        return [v for _ in self._each(objs) for v in found]
+
+    def _E(self, objs, step):
+        ids = _ids(step.args)
+        if ids:
+            found = [self._graph.edges[i] for i in ids
+                     if i in self._graph.edges]
+        else:
+            found = list(self._graph.edges.values())
+        return [e for _ in self._each(objs) for e in found]
+
+    def _inject(self, objs, step):
+        return (objs or []) + list(step.args)
+
+    def _addV(self, objs, step):
+        label = step.args[0] if step.args else 'vertex'
+        return [self._graph.add_vertex(label) for _ in self._each(objs)]
+
+    def _addE(self, objs, step):
+        label = step.args[0]
+        results = []
+        for obj in objs:
+            out_v = in_v = obj
+            for name, args in step.modulators:
+                vertex = self._child(args[0], obj)[0]
+                if name == 'to':
+                    in_v = vertex
+                else:
+                    out_v = vertex
+            results.append(self._graph.add_edge(label, out_v, in_v))
+        return results
+
+    # Filters
+
+    def _hasLabel(self, objs, step):
+        return [obj for obj in objs if obj.label in step.args]
+
+    def _hasId(self, objs, step):
+        ids = _ids(step.args)
+        return [obj for obj in objs if obj.id in ids]
+
+    def _has(self, objs, step):
+        args = step.args
+        if len(args) == 3:
+            objs = [obj for obj in objs if obj.label == args[0]]
+            args = args[1:]
+        if len(args) == 1:
+            return [obj for obj in objs if _values(obj, args[0])]
+        key, predicate = args
+        return [
+            obj for obj in objs
+            if any(_test(predicate, val) for val in _values(obj, key))
+        ]
+
+    def _hasNot(self, objs, step):
+        return [obj for obj in objs if not _values(obj, step.args[0])]
+
+    def _limit(self, objs, step):
+        return objs[:step.args[-1]]
+
+    def _dedup(self, objs, step):
+        results = []
+        for obj in objs:
+            if obj not in results:
+                results.append(obj)
+        return results
+
+    # Maps
+
+    def _id(self, objs, step):
+        return [obj.id for obj in objs]
+
+    def _label(self, objs, step):
+        return [obj.label for obj in objs]
+
+    def _key(self, objs, step):
+        return [obj.key for obj in objs]
+
+    def _value(self, objs, step):
+        return [obj.value for obj in objs]
+
+    def _constant(self, objs, step):
+        return [step.args[0] for _ in objs]
+
+    def _values(self, objs, step):
+        results = []
+        for obj in objs:
+            keys = step.args or self._keys(obj)
+            for key in keys:
+                results.extend(_values(obj, key))
+        return results
+
+    def _properties(self, objs, step):
+        results = []
+        for obj in objs:
+            keys = step.args or self._keys(obj)
+            for key in keys:
+                if isinstance(obj, _Vertex):
+                    results.extend(obj.properties.get(key, []))
+                elif isinstance(obj, _Edge) and key in obj.properties:
+                    results.append(
+                        _Property(key, obj.properties[key], obj))
+                elif isinstance(obj, _VertexProperty) and key in obj.meta:
+                    results.append(_Property(key, obj.meta[key], obj))
+        return results
+
+    def _valueMap(self, objs, step):
+        results = []
+        for obj in objs:
+            keys = step.args or self._keys(obj)
+            if isinstance(obj, _Vertex):
+                results.append({
+                    key: _values(obj, key)
+                    for key in keys if key in obj.properties
+                })
+            else:
+                results.append({
+                    key: _values(obj, key)[0]
+                    for key in keys if _values(obj, key)
+                })
+        return results
+
+    def _keys(self, obj):
+        if isinstance(obj, _VertexProperty):
+            return list(obj.meta)
+        return list(obj.properties)
+
+    def _project(self, objs, step):
+        bys = [args[0] if args else None
+               for name, args in step.modulators if name == 'by']
+        results = []
+        for obj in objs:
+            row = {}
+            for i, key in enumerate(step.args):
+                by = bys[i % len(bys)] if bys else None
+                values = self._child(by, obj)
+                if values:
+                    row[key] = values[0]
+            results.append(row)
+        return results
+
+    def _fold(self, objs, step):
+        return [list(objs)]
+
+    def _unfold(self, objs, step):
+        results = []
+        for obj in objs:
+            if isinstance(obj, (list, tuple)):
+                results.extend(obj)
+            else:
+                results.append(obj)
+        return results
+
+    def _count(self, objs, step):
+        return [len(objs)]
+
+    # Navigation
+
+    def _edges(self, vertex, direction, labels):
+        edges = []
+        for edge in list(self._graph.edges.values()):
+            if labels and edge.label not in labels:
+                continue
+            if direction in ('out', 'both') and edge.out_v is vertex:
+                edges.append((edge, edge.in_v))
+            if direction in ('in', 'both') and edge.in_v is vertex:
+                edges.append((edge, edge.out_v))
+        return edges
+
+    def _out(self, objs, step):
+        return [v for obj in objs
+                for _, v in self._edges(obj, 'out', step.args)]
+
+    def _in(self, objs, step):
+        return [v for obj in objs
+                for _, v in self._edges(obj, 'in', step.args)]
+
+    def _both(self, objs, step):
+        return [v for obj in objs
+                for _, v in self._edges(obj, 'both', step.args)]
+
+    def _outE(self, objs, step):
+        return [e for obj in objs
+                for e, _ in self._edges(obj, 'out', step.args)]
+
+    def _inE(self, objs, step):
+        return [e for obj in objs
+                for e, _ in self._edges(obj, 'in', step.args)]
+
+    def _bothE(self, objs, step):
+        return [e for obj in objs
+                for e, _ in self._edges(obj, 'both', step.args)]
+
+    def _outV(self, objs, step):
+        return [obj.out_v for obj in objs]
+
+    def _inV(self, objs, step):
+        return [obj.in_v for obj in objs]
+
+    def _bothV(self, objs, step):
+        return [v for obj in objs for v in (obj.out_v, obj.in_v)]
+
+    # Branches
+
+    def _union(self, objs, step):
+        return [
+            result for obj in self._each(objs)
+            for child in step.args for result in self._child(child, obj)
+        ]
+
+    def _coalesce(self, objs, step):
+        results = []
+        for obj in objs:
+            for child in step.args:
+                child_results = self._child(child, obj)
+                if child_results:
+                    results.extend(child_results)
+                    break
+        return results
+
+    def _sideEffect(self, objs, step):
+        for obj in objs:
+            self._child(step.args[0], obj)
+        return objs
+
+    # Mutations
+
+    def _property(self, objs, step):
+        args = list(step.args)
+        card = None
+        if isinstance(args[0], Cardinality):
+            card = args.pop(0)
+        key, value = args[:2]
+        meta = dict(zip(args[2::2], args[3::2]))
+        for obj in objs:
+            self._graph.set_property(obj, card, key, value, meta)
+        return objs
+
+    def _drop(self, objs, step):
+        for obj in objs:
+            self._graph.remove(obj)
+        return []
+
+    def _none(self, objs, step):
+        return []
+
+
+def _to_result(obj):
+    """Convert interpreter objects to the driver's structure types"""
+    if isinstance(obj, _Vertex):
+        return graph.Vertex(obj.id, obj.label)
+    elif isinstance(obj, _Edge):
+        return graph.Edge(obj.id, graph.Vertex(obj.out_v.id, obj.out_v.label),
+                          obj.label,
+                          graph.Vertex(obj.in_v.id, obj.in_v.label))
+    elif isinstance(obj, _VertexProperty):
+        return graph.VertexProperty(
+            obj.id, obj.key, obj.value,
+            graph.Vertex(obj.vertex.id, obj.vertex.label))
+    elif isinstance(obj, _Property):
+        return graph.Property(obj.key, obj.value, None)
+    elif isinstance(obj, dict):
+        return {_to_result(k): _to_result(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_to_result(item) for item in obj]
+    return obj
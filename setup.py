@@ -18,6 +18,13 @@ tests_require = [
 ]
 
 extras_require = {
+    'columnar': [
+        'numpy>=1.13',
+    ],
+    'fileio': [
+        'orjson>=2.0',
+        'zstandard>=0.9',
+    ],
     'docs': [
         'Sphinx>=1.6.3',
         'alabaster>=0.7.10',
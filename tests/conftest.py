@@ -1,6 +1,7 @@
 import asyncio
 
 import pytest
+from _pytest.doctest import DoctestItem
 from gremlin_python.process.traversal import Cardinality
 
 from hobgoblin import Hobgoblin, driver, element, properties
@@ -338,10 +339,12 @@ def boolean_class():
 
 
 @pytest.fixture(autouse=True)
-def add_doctest_default(doctest_namespace, tmpdir, event_loop, app):
+def add_doctest_default(doctest_namespace, tmpdir, event_loop, request):
     doctest_namespace['Person'] = Person
     doctest_namespace['loop'] = event_loop
-    doctest_namespace['app'] = app
+    # Only doctests get an app, other tests may run without a server
+    if isinstance(request.node, DoctestItem):
+        doctest_namespace['app'] = request.getfixturevalue('app')
     config = tmpdir.join('config.yml')
     config.write(
         "scheme: 'ws'\n"
@@ -0,0 +1,71 @@
+from hobgoblin import cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_copy():
+    element_cache = cache.ElementCache()
+    row = {'id': 1, 'label': 'person', 'properties': [{'key': 'name'}]}
+    element_cache.set(1, row)
+    cached = element_cache.get(1)
+    assert cached == row
+    cached['properties'][0].pop('key')
+    assert element_cache.get(1) == row
+    assert element_cache.hits == 2
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    element_cache = cache.ElementCache(ttl=10, clock=clock)
+    element_cache.set(1, {'id': 1})
+    clock.now = 9
+    assert element_cache.get(1) == {'id': 1}
+    clock.now = 10
+    assert element_cache.get(1) is None
+    assert 1 not in element_cache
+    assert element_cache.evictions == 1
+    assert element_cache.misses == 1
+
+
+def test_size_eviction():
+    element_cache = cache.ElementCache(maxsize=2)
+    element_cache.set(1, {'id': 1})
+    element_cache.set(2, {'id': 2})
+    element_cache.get(1)
+    element_cache.set(3, {'id': 3})
+    assert 2 not in element_cache
+    assert len(element_cache) == 2
+    assert element_cache.evictions == 1
+
+
+def test_invalidate():
+    element_cache = cache.ElementCache()
+    element_cache.set(1, {'id': 1})
+    element_cache.invalidate(1)
+    element_cache.invalidate(2)
+    assert element_cache.get(1) is None
+
+
+def test_invalidate_refs():
+    element_cache = cache.ElementCache(maxsize=3)
+    element_cache.set(('vertex', 1), {'id': 1})
+    element_cache.set(('edge', 1), {'id': 1}, refs=[('vertex', 1),
+                                                    ('vertex', 2)])
+    element_cache.set(('edge', 2), {'id': 2}, refs=[('vertex', 2),
+                                                    ('vertex', 3)])
+    element_cache.invalidate(('vertex', 1))
+    assert ('vertex', 1) not in element_cache
+    assert ('edge', 1) not in element_cache
+    assert ('edge', 2) in element_cache
+    # Evicted entries don't leave references behind
+    element_cache.set(('vertex', 4), {'id': 4})
+    element_cache.set(('vertex', 5), {'id': 5})
+    element_cache.set(('vertex', 6), {'id': 6})
+    assert ('edge', 2) not in element_cache
+    assert not element_cache._refs
@@ -1,5 +1,16 @@
-from hobgoblin import element
-from hobgoblin.fileio.graphson import dump, dumps, AdjList
+import concurrent.futures
+import gzip
+import json
+import os
+
+import pytest
+
+from hobgoblin import Hobgoblin, driver, element
+from hobgoblin.fileio import encoders, graphson
+from hobgoblin.fileio.adjacency import AdjacencyBuilder
+from hobgoblin.fileio.graphson import (
+    AdjList, IdAllocator, dump, dumps, export, iter_load, iter_load_export,
+    load, write, write_async)
 
 
 # def test_dump_simple_vertex(person):
@@ -47,4 +58,236 @@ def test_dumps(person_class, knows_class):
 
     print(dumps(al1))
     print(dumps(al2))
-    dump('/home/davebshow/test_graph.json', al1, al2)
\ No newline at end of file
+    dump('/home/davebshow/test_graph.json', al1, al2)
+
+
+def _adj_lists(person_class, knows_class, n):
+    previous = None
+    for i in range(n):
+        person = person_class()
+        person.id = i
+        person.name = 'person{}'.format(i)
+        edges = []
+        if previous is not None:
+            knows = knows_class(previous, person)
+            knows.id = n + i
+            edges.append(knows)
+        previous = person
+        yield AdjList(vertex=person, inE=edges, outE=[])
+
+
+def test_write_gzip(tmpdir, person_class, knows_class):
+    fpath = str(tmpdir.join('graph.json.gz'))
+    stats = write(fpath, _adj_lists(person_class, knows_class, 100),
+                  compression='gzip', buffer_size=512)
+    assert stats.lines == 100
+    with gzip.open(fpath, 'rb') as f:
+        data = f.read()
+    assert stats.bytes == len(data)
+    lines = [json.loads(line) for line in data.decode('utf-8').splitlines()]
+    assert len(lines) == 100
+    assert lines[1]['inE']['knows'][0]['outV']['@value'] == 0
+    with pytest.raises(ValueError):
+        write(fpath, [], compression='lzma')
+
+
+@pytest.mark.asyncio
+async def test_write_async(tmpdir, person_class, knows_class):
+    class AsyncAdjLists:
+        def __init__(self):
+            self._adj_lists = _adj_lists(person_class, knows_class, 10)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self._adj_lists)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    fpath = str(tmpdir.join('graph.json'))
+    stats = await write_async(fpath, AsyncAdjLists(), buffer_size=256)
+    assert stats.lines == 10
+    with open(fpath) as f:
+        assert [json.loads(line)['id']['@value'] for line in f] == list(
+            range(10))
+
+
+def test_load(tmpdir, event_loop, person_class, knows_class):
+    person = person_class()
+    person.id = 1
+    person.name = 'dave'
+    person.age = 37
+    person.nicknames = ['davebshow', 'crustee']
+    person.location = 'London, ON'
+    person.location('London, ON').year = 2010
+    person2 = person_class()
+    person2.id = 2
+    person2.name = 'itziri'
+    knows = knows_class(person, person2)
+    knows.notes = 'married'
+    knows.id = 3
+    fpath = str(tmpdir.join('graph.json'))
+    write(fpath, [AdjList(vertex=person, inE=[], outE=[knows]),
+                  AdjList(vertex=person2, inE=[knows], outE=[])])
+
+    app = Hobgoblin(driver.Cluster(event_loop))
+    app.register(person_class, knows_class)
+    adj_lists = iter_load(fpath, app, use_mmap=True)
+    first = next(adj_lists)
+    assert isinstance(first.vertex, person_class)
+    assert first.vertex.id == 1
+    assert first.vertex.name == 'dave'
+    assert first.vertex.age == 37
+    assert {nick.value for nick in first.vertex.nicknames} == {
+        'davebshow', 'crustee'}
+    assert first.vertex.location('London, ON').year == 2010
+    assert not first.inE
+    loaded_knows, = first.outE
+    assert isinstance(loaded_knows, knows_class)
+    assert loaded_knows.source is first.vertex
+    assert loaded_knows.target.id == 2
+    assert loaded_knows.notes == 'married'
+    second, = list(adj_lists)
+    assert second.inE[0].source.id == 1
+    assert second.inE[0].target is second.vertex
+
+    # Without a registry, elements are generic
+    generic = load(fpath)
+    assert isinstance(generic[0].vertex, element.GenericVertex)
+    assert generic[0].vertex.name == 'dave'
+    assert isinstance(generic[0].outE[0], element.GenericEdge)
+
+
+def test_id_allocator(person_class):
+    person = person_class()
+    person.id = 1
+    person.nicknames = ['a', 'b']
+    ids = IdAllocator(100, 102)
+    adj_list = AdjList(vertex=person, inE=[], outE=[])
+    with pytest.raises(ValueError):
+        dumps(adj_list, ids=ids)
+    dumped = json.loads(dumps(adj_list, ids=IdAllocator(100)))
+    vp_ids = [vp['id']['@value'] for vps in dumped['properties'].values()
+              for vp in vps]
+    assert sorted(vp_ids) == list(range(100, 100 + len(vp_ids)))
+
+
+def test_export(tmpdir, person_class, knows_class):
+    dirpath = str(tmpdir.join('export'))
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        manifest = export(
+            dirpath, _adj_lists(person_class, knows_class, 25),
+            shard_size=10, executor=executor, id_stride=1000,
+            compression='gzip')
+    assert manifest['lines'] == 25
+    assert [part['lines'] for part in manifest['parts']] == [10, 10, 5]
+    assert [part['ids'] for part in manifest['parts']] == [
+        [0, 1000], [1000, 2000], [2000, 3000]]
+    vp_ids = set()
+    for i, part in enumerate(manifest['parts']):
+        with gzip.open(str(tmpdir.join('export', part['path'])), 'rt') as f:
+            for line in f:
+                for vps in json.loads(line)['properties'].values():
+                    for vp in vps:
+                        vp_id = vp['id']['@value']
+                        assert i * 1000 <= vp_id < (i + 1) * 1000
+                        vp_ids.add(vp_id)
+    assert len(vp_ids) == 25 * len(person_class.__mapping__.db_properties)
+    loaded = list(iter_load_export(dirpath))
+    assert [adj_list.vertex.id for adj_list in loaded] == list(range(25))
+
+
+def test_export_processes(tmpdir, person_class, knows_class):
+    dirpath = str(tmpdir.join('export'))
+    manifest = export(
+        dirpath, _adj_lists(person_class, knows_class, 25), shard_size=10,
+        workers=2, id_stride=1000)
+    with open(os.path.join(dirpath, graphson.MANIFEST)) as f:
+        assert json.load(f) == manifest
+    assert manifest['format'] == 'graphson-adjacency-list'
+    assert manifest['compression'] is None
+    assert manifest['lines'] == 25
+    assert [part['path'] for part in manifest['parts']] == [
+        'part-00000.json', 'part-00001.json', 'part-00002.json']
+    assert [part['lines'] for part in manifest['parts']] == [10, 10, 5]
+    shard_ids = []
+    for part in manifest['parts']:
+        fpath = os.path.join(dirpath, part['path'])
+        assert part['bytes'] == os.path.getsize(fpath)
+        start, stop = part['ids']
+        ids = set()
+        with open(fpath) as f:
+            for line in f:
+                for vps in json.loads(line)['properties'].values():
+                    ids.update(vp['id']['@value'] for vp in vps)
+        assert all(start <= vp_id < stop for vp_id in ids)
+        shard_ids.append(ids)
+    # Id ranges of the shards are disjoint
+    ranges = [part['ids'] for part in manifest['parts']]
+    assert all(prev[1] <= next_[0] for prev, next_ in zip(ranges, ranges[1:]))
+    assert len(set.union(*shard_ids)) == sum(len(ids) for ids in shard_ids)
+    loaded = list(iter_load_export(dirpath))
+    assert [adj_list.vertex.id for adj_list in loaded] == list(range(25))
+
+
+def test_compiled_encoders(person_class, place_class, knows_class):
+    person = person_class()
+    person.id = 1
+    person.name = 'dave'
+    person.age = 37
+    person.nicknames = ['davebshow', 'crustee']
+    person.location = 'London, ON'
+    person.location('London, ON').year = 2010
+    place = place_class()
+    place.id = 2
+    place.zipcode = 98402
+    place.important_numbers = {1, 2}
+    knows = knows_class(person, place)
+    knows.id = 3
+    for adj_list in (AdjList(vertex=person, inE=[], outE=[knows]),
+                     AdjList(vertex=place, inE=[knows], outE=[])):
+        compiled = dumps(adj_list, ids=IdAllocator())
+        reference = graphson._dumps_reference(adj_list, IdAllocator())
+        assert json.loads(compiled) == json.loads(reference)
+    assert encoders.encoder(person_class) is encoders.encoder(person_class)
+
+
+def test_adjacency_builder(tmpdir, person_class, knows_class):
+    people = []
+    for i in range(20):
+        person = person_class()
+        person.id = i
+        person.name = 'person{}'.format(i)
+        people.append(person)
+    edges = []
+    for i in range(20):
+        knows = knows_class(people[i], people[(i * 7) % 20])
+        knows.id = 100 + i
+        edges.append(knows)
+    stray = knows_class(people[0], person_class())
+    stray.target.id = 99
+    stray.id = 200
+    edges.append(stray)
+    fpath = str(tmpdir.join('graph.json'))
+    with AdjacencyBuilder(spill_size=4, fan_in=3,
+                          tmpdir=str(tmpdir)) as builder:
+        builder.add_edges(reversed(edges))
+        builder.add_vertices(reversed(people))
+        stats = builder.write(fpath)
+        assert builder.orphans == 1
+        spill_dir = builder.spill_dir
+        assert os.listdir(spill_dir)
+    assert stats.lines == 20
+    assert not os.path.exists(spill_dir)
+    loaded = load(fpath)
+    assert [adj_list.vertex.id for adj_list in loaded] == list(range(20))
+    for i, adj_list in enumerate(loaded):
+        assert adj_list.vertex.name == 'person{}'.format(i)
+        out_ids = sorted(e.id for e in adj_list.outE)
+        in_ids = sorted(e.id for e in adj_list.inE)
+        # The stray edge leaves vertex 0, only its target is missing
+        assert out_ids == ([100 + i] if i else [100, 200])
+        assert in_ids == sorted(100 + j for j in range(20)
+                                if (j * 7) % 20 == i)
@@ -0,0 +1,39 @@
+import gc
+
+from hobgoblin import identity
+
+
+def test_identity_map_counters(person):
+    current = identity.IdentityMap()
+    current[1] = person
+    assert current.get(1) is person
+    assert current.get(2) is None
+    assert 2 not in current
+    assert current.hits == 1
+    assert current.misses == 1
+    assert current.evictions == 0
+
+
+def test_lru_identity_map_evicts(person_class):
+    current = identity.LRUIdentityMap(2)
+    people = [person_class() for _ in range(3)]
+    current[1] = people[0]
+    current[2] = people[1]
+    assert current[1] is people[0]
+    current[3] = people[2]
+    assert len(current) == 2
+    assert 2 not in current
+    assert 1 in current
+    assert current.evictions == 1
+
+
+def test_weak_identity_map_drops_unreferenced(person_class):
+    current = identity.WeakIdentityMap()
+    person = person_class()
+    current[1] = person
+    assert current[1] is person
+    del person
+    gc.collect()
+    assert 1 not in current
+    assert current.get(1) is None
+    assert current.evictions == 1
@@ -1,6 +1,6 @@
 import pytest
 
-from hobgoblin import exception, properties
+from hobgoblin import element, exception, mapper, properties
 
 
 def test_property_mapping(person, lives_in):
@@ -65,3 +65,35 @@ def test_getattr_doesnt_exist(person):
 def test_db_name_factory(person, place):
     assert person.__mapping__.nicknames == 'person__nicknames'
     assert place.__mapping__.zipcode == 'place__zipcode'
+
+
+def test_mapping_plans(person_class):
+    mapping = person_class.__mapping__
+    name, attr, to_ogm, validate = mapping.to_ogm_plan['custom__person__age']
+    assert name == 'age'
+    assert attr == '_age'
+    # Identity conversions are skipped
+    assert to_ogm is None
+    assert validate('1') == 1
+    # Vertex properties are set through their descriptor
+    assert mapping.to_ogm_plan['birthplace'][1] is None
+    assert ('name', 'name', '_name', None) in mapping.to_db_plan
+
+
+def test_mapping_plan_conversions():
+    class Upper(properties.String):
+        def to_db(self, val=None):
+            return val.upper()
+
+        def to_ogm(self, val):
+            return val.lower()
+
+    class Shouter(element.Vertex):
+        word = properties.Property(Upper)
+
+    _, _, to_ogm, _ = Shouter.__mapping__.to_ogm_plan['word']
+    assert to_ogm('HEY') == 'hey'
+    shouter = Shouter()
+    shouter.word = 'hey'
+    assert mapper.map_props_to_db(shouter, Shouter.__mapping__) == [
+        (None, 'word', 'HEY', None)]
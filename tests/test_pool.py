@@ -1,7 +1,13 @@
 import asyncio
+import functools
+import gc
+import logging
 
 import pytest
 
+from hobgoblin import Hobgoblin, driver, pool
+from hobgoblin.session import Session
+
 
 @pytest.mark.asyncio
 async def test_pool_init(connection_pool):
@@ -87,3 +93,123 @@ async def test_release_notify(connection_pool):
     conn4 = results[0]
     assert conn4 is conn2
     await connection_pool.close()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class RemoteConnection:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+async def open_remote():
+    return RemoteConnection()
+
+
+@pytest.mark.asyncio
+async def test_session_pool_reuse():
+    session_pool = pool.SessionPool(open_remote, minsize=1, maxsize=2)
+    await session_pool.init_pool()
+    assert len(session_pool) == 1
+    conn1 = await session_pool.acquire()
+    conn2 = await session_pool.acquire()
+    assert conn1 is not conn2
+    assert session_pool.opened == 2
+    session_pool.release(conn2)
+    assert await session_pool.acquire() is conn2
+    assert session_pool.opened == 2
+
+
+@pytest.mark.asyncio
+async def test_session_pool_limits():
+    clock = Clock()
+    session_pool = pool.SessionPool(
+        open_remote, minsize=1, maxsize=2, idle_timeout=10, clock=clock)
+    conns = [await session_pool.acquire() for _ in range(3)]
+    for conn in conns:
+        session_pool.release(conn)
+    assert len(session_pool) == 2
+    clock.now = 10
+    await session_pool.acquire()
+    assert len(session_pool) == 0
+    assert session_pool.opened == 3
+
+
+@pytest.mark.asyncio
+async def test_session_pool_close():
+    clock = Clock()
+    session_pool = pool.SessionPool(
+        open_remote, minsize=1, maxsize=2, idle_timeout=10, clock=clock)
+    conns = [await session_pool.acquire() for _ in range(4)]
+    for conn in conns[:3]:
+        session_pool.release(conn)
+    # Surplus connection
+    assert conns[2].remote_connection.closed is False
+    clock.now = 10
+    await session_pool.acquire()
+    assert conns[2].remote_connection.closed
+    # Expired connection
+    assert conns[0].remote_connection.closed
+    await session_pool.close()
+    assert all(conn.remote_connection.closed for conn in conns)
+    assert len(session_pool) == 0
+    session_pool.release(conns[3])
+    assert len(session_pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_session_pool_release_unclosed(event_loop, caplog):
+    app = Hobgoblin(driver.Cluster(event_loop))
+    app._pool = session_pool = pool.SessionPool(open_remote)
+
+    async def session():
+        conn = await session_pool.acquire()
+        return Session(
+            app, conn.remote_connection, app._get_hashable_id,
+            release=functools.partial(session_pool.release, conn))
+
+    closed = await session()
+    closed.close()
+    closed.close()
+    assert len(session_pool) == 1
+    # Sessions that are never closed return their connection when collected
+    unclosed = await session()
+    assert session_pool.acquired == 1
+    del unclosed
+    gc.collect()
+    assert session_pool.acquired == 0
+    assert len(session_pool) == 1
+    leaked = await session()
+    with caplog.at_level(logging.WARNING):
+        await app.close()
+    assert '1 pooled connections were never released' in caplog.text
+    assert leaked.remote_connection.closed
+
+
+@pytest.mark.asyncio
+async def test_app_session_pool(gremlin_host, gremlin_port, event_loop,
+                                provider, aliases):
+    app = await Hobgoblin.open(
+        event_loop,
+        provider=provider,
+        aliases=aliases,
+        hosts=[gremlin_host],
+        port=gremlin_port,
+        pool_maxsize=2)
+    async with await app.session() as session:
+        conn = session.remote_connection
+        assert len(app.pool) == 0
+    assert len(app.pool) == 1
+    async with await app.session() as session:
+        assert session.remote_connection is conn
+        assert await session.g.V().count().next() is not None
+    await app.close()
@@ -1,9 +1,11 @@
 """Test model properties."""
 
+import pickle
+
 import pytest
 from gremlin_python.statics import long
 
-from hobgoblin import element, exception, manager, properties
+from hobgoblin import element, exception, manager, mapper, properties
 
 
 def test_set_change_property(person, lives_in):
@@ -173,6 +175,52 @@ def test_meta_property_validation(place):
         place.historical_name('spain').year = 'hello'
 
 
+# Dirty tracking
+def test_untracked_element_emits_all(person):
+    person.name = 'leif'
+    assert person.__dirty__ is None
+    props = mapper.map_props_to_db(
+        person, person.__mapping__, changed_only=True)
+    assert len(props) == len(mapper.map_props_to_db(person,
+                                                    person.__mapping__))
+
+
+def test_dirty_property(person):
+    person.name = 'leif'
+    person.age = 28
+    mapper.mark_clean(person)
+    assert not mapper.map_props_to_db(
+        person, person.__mapping__, changed_only=True)
+    person.age = 28
+    assert not person.__dirty__
+    person.age = 29
+    props = mapper.map_props_to_db(
+        person, person.__mapping__, changed_only=True)
+    assert props == [(None, 'custom__person__age', 29, None)]
+
+
+def test_dirty_vertex_property_manager(person):
+    person.nicknames = ['leif']
+    mapper.mark_clean(person)
+    person.nicknames.append('leifur')
+    assert person.__dirty__ == {'nicknames'}
+    props = mapper.map_props_to_db(
+        person, person.__mapping__, changed_only=True)
+    assert len(props) == 2
+    assert {p[2] for p in props} == {'leif', 'leifur'}
+
+
+def test_dirty_meta_property(place):
+    place.historical_name = ['Iowa City']
+    mapper.mark_clean(place)
+    place.historical_name('Iowa City').year = 1839
+    assert not place.__dirty__
+    props = mapper.map_props_to_db(
+        place, place.__mapping__, changed_only=True)
+    assert len(props) == 1
+    assert props[0][3]['year'] == 1839
+
+
 class TestString:
     def test_validation(self, string):
         assert string.validate(1) == '1'
@@ -248,3 +296,102 @@ class TestBoolean:
     def test_initval_to_db_true(self, boolean_class):
         boolean = boolean_class(False)
         assert not boolean.to_db()
+
+
+# Compact instances
+def test_property_slots(person):
+    assert '_name' in type(person).__slots__
+    person.name = 'leif'
+    person.nicknames = ['leifur']
+    mapper.mark_clean(person)
+    assert not person.__dict__
+    assert not person.nicknames[0].__dict__
+
+
+def test_tracking_property_names():
+
+    class Job(element.Vertex):
+        dirty = properties.Property(properties.Boolean)
+        loaded = properties.Property(properties.Boolean)
+        loader = properties.Property(properties.String)
+        name = properties.Property(properties.String)
+
+    job = Job()
+    mapper.mark_clean(job)
+    job.loaded = True
+    job.dirty = False
+    assert job.__loaded__ is None
+    assert job.__dirty__ == {'loaded', 'dirty'}
+    assert job.name is None
+
+
+def test_reserved_property_names():
+    with pytest.raises(exception.MappingError):
+
+        class MyEdge(element.Edge):
+            source = properties.Property(properties.String)
+
+    with pytest.raises(exception.MappingError):
+
+        class MyVertexProperty(element.VertexProperty):
+            val = properties.Property(properties.String)
+
+
+def test_clean_elements_share_dirty_set(person, place):
+    mapper.mark_clean(person)
+    mapper.mark_clean(place)
+    assert person.__dirty__ is place.__dirty__
+    person.name = 'leif'
+    assert person.__dirty__ == {'name'}
+    assert not place.__dirty__
+
+
+# Bulk construction
+def test_init_kwargs(person_class):
+    person = person_class(name='leif', age='28')
+    assert person.name == 'leif'
+    assert person.age == 28
+    with pytest.raises(AssertionError):
+        person_class(height=2)
+
+
+def test_from_rows(person_class):
+    people = person_class.from_rows(
+        [(1, 'dave', '35'), (2, 'leif', '28')],
+        fields=['id', 'name', 'age'])
+    assert [(p.id, p.name, p.age) for p in people] == [(1, 'dave', 35),
+                                                       (2, 'leif', 28)]
+    people = person_class.from_rows([{'name': 'dave', 'nicknames': ['d']}])
+    assert people[0].nicknames[0].value == 'd'
+    # Values are stored as is without validation
+    people = person_class.from_rows(
+        [{'age': '35'}], validate=False)
+    assert people[0].age == '35'
+    with pytest.raises(exception.MappingError):
+        person_class.from_rows([{'height': 2}])
+
+
+def test_edge_from_rows(person_class, knows_class):
+    dave, leif = person_class(), person_class()
+    knows = knows_class.from_rows(
+        [(dave, leif, 'online')], fields=['source', 'target', 'notes'])
+    assert knows[0].source is dave
+    assert knows[0].target is leif
+    assert knows[0].notes == 'online'
+
+
+def test_pickle(person_class):
+    person = person_class()
+    person.name = 'dave'
+    person.nicknames = ['davebshow', 'crustee']
+    person.location = 'London, ON'
+    person.location('London, ON').year = 2010
+    person.__dirty__ = mapper.CLEAN
+    copy = pickle.loads(pickle.dumps(person))
+    assert copy.name == 'dave'
+    assert [vp.value for vp in copy.nicknames] == ['davebshow', 'crustee']
+    assert copy.location('London, ON').year == 2010
+    # Managers are bound to the copy
+    copy.nicknames.append('dj')
+    assert copy.__dirty__ == {'nicknames'}
+    assert not person.__dirty__
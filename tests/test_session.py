@@ -3,7 +3,7 @@
 import pytest
 from gremlin_python.process.traversal import Binding
 
-from hobgoblin import element
+from hobgoblin import element, exception, hooks
 from hobgoblin.session import bindprop
 
 
@@ -75,6 +75,55 @@ class TestCreationApi:
         assert lives_in.target.__label__ == 'place'
         await app.close()
 
+    @pytest.mark.asyncio
+    async def test_flush_batched(self, app, person_class, place_class,
+                                 lives_in_class):
+        session = await app.session()
+        people = [person_class(name=str(i)) for i in range(5)]
+        montreal = place_class()
+        montreal.name = 'Montreal'
+        lives_in = [lives_in_class(p, montreal) for p in people]
+        session.add(*lives_in)
+        session.add(montreal, *people)
+        await session.flush(batch_size=2)
+        for elem in people + lives_in + [montreal]:
+            assert session.current[app._get_hashable_id(elem.id)] is elem
+        result = await session.g.V(Binding('vid', people[0].id)).next()
+        assert result is people[0]
+        assert result.name == '0'
+        count = await session.g.V(Binding('vid', montreal.id)).inE(
+            'lives_in').count().next()
+        assert count == 5
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_flush_concurrent(self, app, person_class, place_class,
+                                    lives_in_class):
+        session = await app.session()
+        people = [person_class(name=str(i)) for i in range(8)]
+        montreal = place_class()
+        lives_in = [lives_in_class(p, montreal) for p in people]
+        session.add(*lives_in)
+        session.add(montreal, *people)
+        await session.flush(concurrency=4)
+        for elem in people + lives_in + [montreal]:
+            assert session.current[app._get_hashable_id(elem.id)] is elem
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_flush_concurrent_errors(self, app, person_class,
+                                           lives_in_class):
+        session = await app.session()
+        dave = person_class()
+        orphan = lives_in_class()
+        orphan.source = dave
+        session.add(dave, orphan)
+        with pytest.raises(exception.FlushError) as excinfo:
+            await session.flush(concurrency=2)
+        assert [elem for elem, _ in excinfo.value.errors] == [orphan]
+        assert hasattr(dave, 'id')
+        await app.close()
+
     @pytest.mark.asyncio
     async def test_create_edge_no_source(self, app, lives_in, person):
         session = await app.session()
@@ -245,6 +294,103 @@ class TestCreationApi:
         assert not result.age
         await app.close()
 
+    @pytest.mark.asyncio
+    async def test_upsert_removed_vertex(self, app, person):
+        session = await app.session()
+        person.name = 'dave'
+        await session.save(person)
+        rid = person.id
+        await session.g.V(Binding('vid', rid)).drop().iterate()
+        result = await session.save(person)
+        assert result is person
+        assert person.id != rid
+        assert person.name == 'dave'
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_remove_upserted(self, app, person_class, knows_class):
+        session = await app.session()
+        dave = await session.save(person_class())
+        leif = await session.save(person_class())
+        knows = await session.save(knows_class(dave, leif))
+        # Elements with ids are saved by the upsert traversal
+        dave.name = 'dave'
+        await session.save(dave)
+        await session.save(knows)
+        await session.remove_edge(knows)
+        await session.remove_vertex(dave)
+        result = await session.g.V(Binding('vid', dave.id)).next()
+        assert not result
+        result = await session.g.E(Binding('eid', knows.id)).next()
+        assert not result
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_observer(self, app, person_class):
+
+        class Recorder(hooks.Observer):
+            def __init__(self):
+                self.events = []
+
+            def on_request(self, event):
+                self.events.append(('request', event))
+
+            def on_response(self, event):
+                self.events.append(('response', event))
+
+            def on_hydrate(self, event):
+                self.events.append(('hydrate', event))
+
+        recorder = Recorder()
+        app.register_observer(recorder)
+        session = await app.session()
+        dave = person_class()
+        dave.name = 'dave'
+        await session.save(dave)
+        hooks_fired = [hook for hook, _ in recorder.events]
+        assert hooks_fired == ['request', 'response', 'hydrate']
+        _, request = recorder.events[0]
+        assert request.element_class is person_class
+        assert request.bytes_sent > 0
+        _, response = recorder.events[1]
+        assert response.count == 1
+        assert response.duration >= 0
+        recorder.events = []
+        results = await session.g.V(dave.id).toList()
+        assert results == [dave]
+        hooks_fired = [hook for hook, _ in recorder.events]
+        # The user traversal, then the hydration request
+        assert hooks_fired == [
+            'request', 'request', 'response', 'hydrate', 'response']
+        assert recorder.events[-1][1].count == 1
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_eval_mode(self, app, person_class, knows):
+        session = await app.session(op='eval')
+        dave = person_class()
+        dave.name = 'dave'
+        dave.nicknames = ['davey']
+        leif = person_class()
+        await session.save(dave)
+        await session.save(leif)
+        assert dave.name == 'dave'
+        assert dave.nicknames[0].value == 'davey'
+        knows.source = dave
+        knows.target = leif
+        knows.notes = 'online'
+        await session.save(knows)
+        assert knows.id
+        dave.name = 'david'
+        await session.save(dave)
+        result = await session.g.V(dave.id).next()
+        assert result.name == 'david'
+        assert result.nicknames[0].value == 'davey'
+        await session.remove_edge(knows)
+        await session.remove_vertex(leif)
+        assert not await session.g.V(leif.id).next()
+        await app.close()
+
     @pytest.mark.skip_if_dse
     @pytest.mark.asyncio
     async def test_update_edge(self, app, person_class, knows):
@@ -281,6 +427,72 @@ class TestTraversalApi:
         assert results
         await app.close()
 
+    @pytest.mark.asyncio
+    async def test_all_streamed(self, app, person_class):
+        session = await app.session()
+        people = [person_class() for _ in range(5)]
+        session.add(*people)
+        await session.flush()
+        resp = session.traversal(person_class, prefetch=2)
+        results = []
+        async for msg in resp:
+            assert isinstance(msg, person_class)
+            results.append(msg)
+        assert set(people) <= set(results)
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_lazy(self, app, person_class):
+        session = await app.session()
+        dave = person_class(name='dave')
+        leif = person_class(name='leif')
+        session.add(dave, leif)
+        await session.flush()
+        session = await app.session()
+        traversal = session.traversal(person_class, lazy=True).hasId(
+            Binding('dave_id', dave.id), Binding('leif_id', leif.id))
+        proxies = await traversal.toList()
+        assert len(proxies) == 2
+        for proxy in proxies:
+            assert isinstance(proxy, person_class)
+            with pytest.raises(exception.NotLoadedError):
+                proxy.name
+        loader = proxies[0].__loader__
+        assert len(loader.elements) == 2
+        await session.load(proxies[0])
+        assert {proxy.name for proxy in proxies} == {'dave', 'leif'}
+        # Loaded siblings are dropped by their loader
+        assert not loader.elements
+        assert all(proxy.__loader__ is None for proxy in proxies)
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_only_empty(self, app, person_class):
+        session = await app.session()
+        with pytest.raises(ValueError):
+            session.traversal(person_class, only=[])
+        await app.close()
+
+    @pytest.mark.asyncio
+    async def test_only(self, app, person_class):
+        session = await app.session()
+        dave = person_class(name='dave', age=35)
+        await session.save(dave)
+        session = await app.session()
+        traversal = session.traversal(person_class, only=['age']).hasId(
+            Binding('dave_id', dave.id))
+        partial = await traversal.next()
+        assert partial.age == 35
+        with pytest.raises(exception.NotLoadedError):
+            partial.name
+        partial.age = 36
+        await session.save(partial)
+        session = await app.session()
+        result = await session.g.V(Binding('vid', dave.id)).next()
+        assert result.name == 'dave'
+        assert result.age == 36
+        await app.close()
+
     @pytest.mark.asyncio
     async def test_next_one(self, app, person_class):
         session = await app.session()
@@ -394,7 +606,20 @@ class TestTraversalApi:
             'y').select('x', 'y').fold()
         resp = await traversal.next()
         for item in resp:
-            # FIXME BROKEN
-            # assert isinstance(item['x'], person_class)
+            assert isinstance(item['x'], person_class)
             assert isinstance(item['y'], dict)
         await app.close()
+
+    @pytest.mark.asyncio
+    async def test_deserialize_path(self, app, person_class, knows_class):
+        session = await app.session()
+        dave = person_class()
+        leif = person_class()
+        knows = knows_class(dave, leif)
+        session.add(dave, leif, knows)
+        await session.flush()
+        traversal = session.g.V(Binding('vid', dave.id)).outE('knows').inV() \
+                           .path()
+        path = await traversal.next()
+        assert path.objects == [dave, knows, leif]
+        await app.close()
@@ -0,0 +1,69 @@
+import json
+
+from aiogremlin.process.graph_traversal import __
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+from gremlin_python.process.traversal import Binding
+from gremlin_python.structure.graph import Graph
+from gremlin_python.structure.io.graphsonV3d0 import GraphSONWriter
+
+from hobgoblin import templates
+
+
+def build():
+    g = GraphTraversalSource(Graph(), None)
+    traversal = g.V(('sid', 1)).addE('knows')
+    return traversal.to(__.V(('tid', 2))).property(('k0', 'name'),
+                                                   ('v0', 'dave'))
+
+
+def test_bind():
+    template = templates.TraversalTemplate(build().bytecode)
+    bytecode = template.bind({'sid': 3, 'tid': 4, 'v0': 'leifur'})
+    assert bytecode.bindings == {
+        'sid': 3, 'tid': 4, 'k0': 'name', 'v0': 'leifur'}
+    assert isinstance(bytecode.step_instructions[0][1], Binding)
+    assert bytecode.step_instructions[0][1].value == 3
+    child = bytecode.step_instructions[2][1]
+    assert child.step_instructions[0][1].value == 4
+    # The template itself is unchanged
+    assert template.bytecode.bindings['sid'] == 1
+    assert template.bytecode.step_instructions[0][1].value == 1
+
+
+def test_bind_serialized():
+    template = templates.TraversalTemplate(build().bytecode)
+    bytecode = template.bind({'sid': 3})
+    # Bound values are sent as bindings, not inlined in the script
+    steps = json.loads(
+        GraphSONWriter().writeObject(bytecode))['@value']['step']
+    assert steps[0][1]['@type'] == 'g:Binding'
+    assert steps[0][1]['@value']['key'] == 'sid'
+    assert steps[0][1]['@value']['value']['@value'] == 3
+
+
+def test_cache():
+    template_cache = templates.TemplateCache()
+    calls = []
+
+    def counted_build():
+        calls.append(1)
+        return build()
+
+    template = template_cache.get('key', counted_build)
+    assert template_cache.get('key', counted_build) is template
+    assert len(calls) == 1
+    assert len(template_cache) == 1
+    template_cache.clear()
+    assert len(template_cache) == 0
+
+
+def test_cache_maxsize():
+    template_cache = templates.TemplateCache(maxsize=2)
+    first = template_cache.get(1, build)
+    template_cache.get(2, build)
+    assert template_cache.get(1, build) is first
+    template_cache.get(3, build)
+    assert len(template_cache) == 2
+    assert template_cache.evictions == 1
+    # The least recently used template was evicted
+    assert template_cache.get(1, build) is first
@@ -0,0 +1,190 @@
+"""Session tests against the in-process fake remote connection"""
+
+import asyncio
+
+import pytest
+from aiogremlin.driver.protocol import Message
+from aiogremlin.driver.resultset import ResultSet
+
+from hobgoblin import Hobgoblin, driver, testing
+from hobgoblin.fileio.graphson import AdjList, iter_load, write
+from hobgoblin.session import Session
+
+
+@pytest.fixture
+def offline_app(event_loop, person_class, place_class, knows_class,
+                lives_in_class):
+    app = Hobgoblin(driver.Cluster(event_loop))
+    app.register(person_class, place_class, knows_class, lives_in_class)
+    return app
+
+
+@pytest.fixture
+def remote():
+    return testing.FakeRemoteConnection()
+
+
+@pytest.fixture
+def offline_session(offline_app, remote):
+    return Session(offline_app, remote, offline_app._get_hashable_id)
+
+
+@pytest.mark.asyncio
+async def test_save_and_get(offline_session, remote, person_class):
+    dave = person_class()
+    dave.name = 'dave'
+    dave.nicknames = ['davey', 'dj']
+    await offline_session.save(dave)
+    assert dave.id in remote.graph.vertices
+    assert remote.requests == 1
+    dave.name = 'david'
+    await offline_session.save(dave)
+    offline_session.current.clear()
+    result = await offline_session.g.V(dave.id).next()
+    assert result is not dave
+    assert result.name == 'david'
+    assert [vp.value for vp in result.nicknames] == ['davey', 'dj']
+
+
+@pytest.mark.asyncio
+async def test_flush_and_traverse(offline_session, remote, person_class,
+                                  place_class, lives_in_class):
+    people = [person_class(name=str(i)) for i in range(5)]
+    montreal = place_class()
+    montreal.name = 'Montreal'
+    lives_in = [lives_in_class(p, montreal) for p in people]
+    offline_session.add(montreal, *people)
+    offline_session.add(*lives_in)
+    await offline_session.flush()
+    assert len(remote.graph) == 11
+    count = await offline_session.g.V(montreal.id).inE(
+        'lives_in').count().next()
+    assert count == 5
+    results = await offline_session.traversal(person_class).toList()
+    assert set(results) == set(people)
+    await offline_session.remove_vertex(montreal)
+    assert not remote.graph.edges
+
+
+@pytest.mark.asyncio
+async def test_drop_properties(offline_session, remote, person_class,
+                               knows_class):
+    dave = person_class()
+    dave.location = 'London, ON'
+    dave.location('London, ON').year = 2010
+    leif = person_class()
+    knows = knows_class(dave, leif)
+    knows.notes = 'online'
+    offline_session.add(dave, leif, knows)
+    await offline_session.flush()
+    await offline_session._g.V(dave.id).properties(
+        'location').properties('year').drop().iterate()
+    location, = remote.graph.vertices[dave.id].properties['location']
+    assert location.value == 'London, ON'
+    assert not location.meta
+    await offline_session._g.E(knows.id).properties('notes').drop().iterate()
+    assert 'notes' not in remote.graph.edges[knows.id].properties
+
+
+@pytest.mark.asyncio
+async def test_latency(offline_app, person_class):
+    remote = testing.FakeRemoteConnection(latency=0.01)
+    session = Session(offline_app, remote, offline_app._get_hashable_id)
+    start = offline_app._loop.time()
+    await session.save(person_class())
+    assert offline_app._loop.time() - start >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_unsupported_step(offline_session):
+    with pytest.raises(NotImplementedError):
+        await offline_session._g.V().order().toList()
+
+
+@pytest.mark.asyncio
+async def test_columns(offline_session, person_class, knows_class):
+    people = [person_class(name=str(i), age=i) for i in range(5)]
+    people[0].age = None
+    people[1].nicknames = ['one', 'uno']
+    offline_session.add(*people)
+    knows = knows_class(people[0], people[1])
+    offline_session.add(knows)
+    await offline_session.flush()
+    offline_session.current.clear()
+    stream = offline_session.columns(
+        person_class, only=['name', 'age', 'nicknames'], chunk_size=2)
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert not offline_session.current
+    rows = {}
+    for chunk in chunks:
+        for i, vid in enumerate(chunk.ids):
+            rows[vid] = (chunk['name'][i], chunk['age'][i],
+                         list(chunk['nicknames'][i]))
+    assert rows[people[0].id] == ('0', None, [])
+    assert rows[people[1].id] == ('1', 1, ['one', 'uno'])
+    assert rows[people[4].id] == ('4', 4, [])
+    columns = await offline_session.columns(knows_class).all()
+    assert list(columns.ids) == [knows.id]
+    assert list(columns.sources) == [people[0].id]
+    assert list(columns.targets) == [people[1].id]
+    assert list(columns['notes']) == ['N/A']
+
+
+@pytest.mark.asyncio
+async def test_receive_partial_batch(offline_session, event_loop):
+    traversers = ResultSet('request', None, event_loop)
+    for i in (1, 2, 3):
+        traversers.queue_result(Message(206, i, ''))
+    result_set = ResultSet('request', None, event_loop)
+    task = event_loop.create_task(
+        offline_session._receive(traversers, result_set, {}))
+    # Results already received aren't held back until a full batch arrives
+    assert await asyncio.wait_for(result_set.one(), 1) == 1
+    assert await result_set.one() == 2
+    assert await result_set.one() == 3
+    traversers.queue_result(Message(200, 4, ''))
+    traversers.queue_result(None)
+    assert await result_set.one() == 4
+    assert await result_set.one() is None
+    await task
+
+
+@pytest.mark.asyncio
+async def test_save_loaded(tmpdir, offline_app, offline_session, remote,
+                           person_class, knows_class):
+    dave = person_class(name='dave')
+    dave.id = 1
+    dave.nicknames = ['davey']
+    leif = person_class(name='leif')
+    leif.id = 2
+    knows = knows_class(dave, leif)
+    knows.id = 3
+    fpath = str(tmpdir.join('graph.json'))
+    write(fpath, [AdjList(vertex=dave, inE=[], outE=[knows]),
+                  AdjList(vertex=leif, inE=[knows], outE=[])])
+    adj_lists = list(iter_load(fpath, offline_app))
+    # Loaded elements aren't in the db yet, nothing is skipped as unchanged
+    for adj_list in adj_lists:
+        assert adj_list.vertex.__dirty__ is None
+        await offline_session.save(adj_list.vertex)
+    assert remote.requests == 2
+    assert len(remote.graph) == 2
+    names = {v.name for v in await offline_session.g.V().toList()}
+    assert names == {'dave', 'leif'}
+
+
+@pytest.mark.asyncio
+async def test_template_cache_bound(event_loop, remote, person_class):
+    app = Hobgoblin(driver.Cluster(event_loop), template_cache_size=3)
+    app.register(person_class)
+    session = Session(app, remote, app._get_hashable_id)
+    for n in range(1, 11):
+        person = person_class(name='dave')
+        person.nicknames = [str(i) for i in range(n)]
+        await session.save(person)
+    assert remote.requests == 10
+    assert len(app.templates) == 3
+    assert app.templates.evictions == 7